@@ -1,80 +1,229 @@
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
-from prompt import AGENT_INSTRUCTION, AGENT_RESPONSE
+from prompt import CORE_INSTRUCTION, GREETING_INSTRUCTION
 
 from livekit import agents
-from livekit.agents import AgentSession, Agent, RoomInputOptions, function_tool, RunContext
+from livekit.agents import AgentSession, Agent, RoomInputOptions, RunContext
 from livekit.agents.llm import ToolError
 from livekit.plugins import google, noise_cancellation
+import asyncio
 import datetime
 import os
-import shutil
-import subprocess
-import sys
 import logging
 from pathlib import Path
-import googleapiclient.discovery
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-import pickle
-import requests
+from typing_extensions import NotRequired, TypedDict
 import json
 import webbrowser
+from app_launcher import get_launcher_catalog
+from calendar_client import get_calendar_client
+from calendar_store import free_gaps, parse_query_time, query_events, synced_calendar_store
+from content_search import get_content_searcher, walk_files
+from file_index import get_file_index
+from fs_batch import BatchValidationError, get_file_batch
+from resilience import TURN_BUDGET_SECONDS, deadline_scope
+from memory_store import count_tokens, get_memory_store, memory_note
+from log_pipeline import configure_logging, drop_session_trace, log_stats
+from metrics import current_job, current_session, current_tool, external_call, instrumented_tool, registry, start_metrics_server, startup_latency
+from services import get_services, worker_load
+from spotify_client import get_spotify_client
+from trash import format_bytes, get_trash
+from track_cache import SPOTIFY_SEARCH_CANDIDATES, get_track_cache
+from tool_executor import get_tool_executor, MAX_CONCURRENT_TOOLS_PER_SESSION
+
+# Content-search worker processes run this script again as __mp_main__ before their first task.
+# They only need content_search, so they skip the process-wide setup below.
+SEARCH_WORKER_IMPORT = __name__ == '__mp_main__'
 
-# Configure logging for debugging
-logging.basicConfig(level=logging.INFO)
+# JSON-line logging through a queue, tagged with the job, session and tool of each record
+LOG_FIELDS = {'job': current_job, 'session': current_session, 'tool': current_tool}
+if not SEARCH_WORKER_IMPORT:
+    configure_logging(LOG_FIELDS)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-load_dotenv()
-
-# Google Calendar API setup
-SCOPES = ['https://www.googleapis.com/auth/calendar']
-CREDENTIALS_FILE = 'credentials.json'  # Path to Google API credentials JSON
-TOKEN_FILE = 'token.pickle'  # Stores OAuth tokens
-
-def get_calendar_service():
-    """Initialize Google Calendar API service."""
-    creds = None
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
-            creds = pickle.load(token)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
+if not SEARCH_WORKER_IMPORT:
+    load_dotenv()
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+# Thread pool class and timeout (seconds) for each tool's blocking work.
+# A class of None means the tool's work is already async and runs on the event loop.
+TOOL_SPECS = {
+    'open_application': ('system', 10),
+    'open_brave_url': ('system', 10),
+    'create_directory': ('filesystem', 10),
+    'rename_directory': ('filesystem', 10),
+    'delete_file': ('filesystem', 10),
+    'delete_directory': ('filesystem', 10),
+    'restore_deleted_folder': ('filesystem', 10),
+    'locate_file_or_folder': ('filesystem', 60),
+    'rebuild_file_index': ('filesystem', 600),
+    'search_file_contents': ('filesystem', 60),
+    'batch_file_operations': ('filesystem', 120),
+    'spotify_control': (None, 15),
+    'spotify_search_and_play': (None, 15),
+    'create_calendar_event': ('calendar', 30),
+    'delete_calendar_event': ('calendar', 30),
+    'batch_create_calendar_events': ('calendar', 60),
+    'batch_update_calendar_events': ('calendar', 60),
+    'batch_delete_calendar_events': ('calendar', 60),
+    'check_calendar_availability': ('calendar', 30),
+    'get_upcoming_calendar_events': ('calendar', 30),
+}
+
+class FileOperation(TypedDict):
+    action: str  # create, rename, move or delete
+    path: str
+    destination: NotRequired[str]  # new name for rename, target folder or path for move
+
+class CalendarEventSpec(TypedDict):
+    summary: str
+    start_time: str
+    end_time: str
+    description: NotRequired[str]
+
+class CalendarEventUpdate(TypedDict):
+    event_id: str
+    summary: NotRequired[str]
+    start_time: NotRequired[str]
+    end_time: NotRequired[str]
+    description: NotRequired[str]
+
+def calendar_event_body(summary=None, start_time=None, end_time=None, description=None):
+    """Build a Calendar event resource from the fields that are set."""
+    event = {}
+    if summary is not None:
+        event['summary'] = summary
+    if description is not None:
+        event['description'] = description
+    if start_time is not None:
+        event['start'] = {'dateTime': start_time, 'timeZone': 'UTC'}
+    if end_time is not None:
+        event['end'] = {'dateTime': end_time, 'timeZone': 'UTC'}
+    return event
+
+def format_batch_results(verb, labels, results):
+    """One summary line plus one line per item for a batch calendar call."""
+    lines = []
+    succeeded = 0
+    for label, (response, error) in zip(labels, results):
+        if error is not None:
+            lines.append(f"- {label}: failed ({error})")
         else:
-            flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_FILE, SCOPES)
-            creds = flow.run_local_server(port=0)
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
-    return googleapiclient.discovery.build('calendar', 'v3', credentials=creds)
-
-# Spotify API setup
-SPOTIFY_TOKEN_URL = 'https://accounts.spotify.com/api/token'
-SPOTIFY_API_BASE = 'https://api.spotify.com/v1'
-
-def get_spotify_access_token():
-    """Get Spotify access token using client credentials."""
-    client_id = os.getenv('SPOTIFY_CLIENT_ID')
-    client_secret = os.getenv('SPOTIFY_CLIENT_SECRET')
-    if not client_id or not client_secret:
-        raise ToolError("Spotify client ID or secret not set in environment variables.")
-    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    data = {
-        'grant_type': 'client_credentials',
-        'client_id': client_id,
-        'client_secret': client_secret
-    }
-    response = requests.post(SPOTIFY_TOKEN_URL, headers=headers, data=data)
-    if response.status_code == 200:
-        return response.json()['access_token']
-    else:
-        raise ToolError(f"Failed to get Spotify access token: {response.text}")
+            succeeded += 1
+            lines.append(f"- {label}: {verb}")
+    return '\n'.join([f"{succeeded} of {len(labels)} events {verb}."] + lines)
+
+def describe_event(event):
+    return f"{event.get('summary', '(no title)')} from {event['_start']:%Y-%m-%d %H:%M} to {event['_end']:%H:%M} UTC (ID: {event['id']})"
+
+def update_calendar_mirror(changed=(), removed=()):
+    """Reflect tool changes in the local calendar mirror; the next sync corrects any miss."""
+    try:
+        store = synced_calendar_store()
+        if store is None:
+            return  # the initial sync under way will list these changes
+        for event in changed:
+            store.apply(event)
+        for event_id in removed:
+            store.remove(event_id)
+    except Exception as e:
+        logger.error(f"Calendar mirror update failed: {str(e)}")
+
+def calendar_conflicts(start_time, end_time):
+    """Events in the local calendar mirror that overlap the given time range, or None if the mirror can't tell yet."""
+    try:
+        store = synced_calendar_store()
+        return None if store is None else store.overlapping(start_time, end_time)
+    except Exception as e:
+        logger.error(f"Calendar conflict check failed: {str(e)}")
+        return None
 
 class Assistant(Agent):
     def __init__(self) -> None:
-        super().__init__(instructions=AGENT_INSTRUCTION)
+        memory = get_memory_store()
+        instructions, ids = memory.instructions(CORE_INSTRUCTION)
+        super().__init__(instructions=instructions)
+        self._tool_slots = asyncio.Semaphore(MAX_CONCURRENT_TOOLS_PER_SESSION)
+        self._memory_ids = set(ids)  # memories the model has been given or told this session
+        self._memory_tokens = count_tokens(instructions)  # instructions plus memory notes sent so far
+        logger.info(
+            f"Session instructions: {self._memory_tokens} tokens with {len(ids)} memories "
+            f"(all {len(memory)} memories would take {count_tokens(memory.full_prompt(CORE_INSTRUCTION))})"
+        )
+
+    async def on_user_transcript(self, text):
+        """Learn from the user's words and bring in the memories relevant to them.
 
-    @function_tool()
+        Called from the session's final user_input_transcribed events: the
+        realtime model does its own turn detection, so on_user_turn_completed
+        is never invoked. The final transcript arrives after the model has
+        replied, and any forget_fact call it made, so forgetting is left to
+        that tool.
+        """
+        memory = get_memory_store()
+        # The model heard what was just learned, so those need no note
+        self._memory_ids.update(learned['id'] for _, learned in memory.learn_from(text, forget=False))
+        await self._add_memories([m for m in memory.search(text) if m['id'] not in self._memory_ids])
+
+    async def _add_memories(self, memories):
+        """Give the model memories it has not seen this session, as one short note in the chat context.
+
+        The instructions are left alone: Gemini's realtime session does not
+        replace them on update_instructions but appends the whole prompt as a
+        new turn, so each refresh would grow the context by the full prompt.
+        The note is a user item wrapped the way the framework wraps
+        mid-conversation instructions; the plugin drops a system item sent on
+        its own. It applies from the next response.
+        """
+        if not memories:
+            return
+        note = f"<instructions>\n{memory_note(memories)}\n</instructions>"
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.add_message(role='user', content=note)
+        try:
+            await self.update_chat_ctx(chat_ctx)
+        except Exception as e:
+            logger.error(f"Failed to add memories to the session: {str(e)}")
+            return
+        self._memory_ids.update(m['id'] for m in memories)
+        self._memory_tokens += count_tokens(note)
+        logger.info(
+            f"Added memories {[m['id'] for m in memories]} to the session ({count_tokens(note)} tokens; "
+            f"{self._memory_tokens} instruction and memory tokens sent so far)"
+        )
+
+    async def _run(self, tool_name, fn, *args, **kwargs):
+        """Run a tool's blocking work on its thread pool, bounded per session.
+
+        Outbound Spotify and Calendar calls made by the work share a deadline
+        of the turn budget or the tool timeout, whichever is shorter.
+        """
+        tool_class, timeout = TOOL_SPECS[tool_name]
+        async with self._tool_slots:
+            with deadline_scope(min(TURN_BUDGET_SECONDS, timeout)):
+                return await get_tool_executor().run(tool_class, fn, *args, timeout=timeout, **kwargs)
+
+    @instrumented_tool()
+    async def remember_fact(self, context: RunContext, fact: str) -> str:
+        """Remember a fact or preference about the user for future sessions."""
+        memory, replaced = get_memory_store().remember(fact)
+        self._memory_ids.add(memory['id'])  # the model has it from its own call
+        logger.info(f"{'Updated' if replaced else 'Stored'} memory {memory['id']}: {memory['text']}")
+        return f"{'Updated' if replaced else 'Remembered'}: {memory['text']}"
+
+    @instrumented_tool()
+    async def forget_fact(self, context: RunContext, fact: str) -> str:
+        """Forget a previously remembered fact or preference about the user."""
+        memory = get_memory_store().forget(fact)
+        if memory is None:
+            raise ToolError(f"I don't have a memory matching: {fact}")
+        logger.info(f"Forgot memory {memory['id']}: {memory['text']}")
+        return f"Forgot: {memory['text']}"
+
+    @instrumented_tool()
     async def get_current_datetime(self, context: RunContext) -> str:
         """Get the current date, time, month, and year."""
         try:
@@ -83,309 +232,600 @@ class Assistant(Agent):
             logger.info(f"Retrieved current datetime: {formatted_datetime}")
             return formatted_datetime
         except Exception as e:
-            logger.error(f"Failed to get datetime: {str(e)}")
             raise ToolError(f"Failed to get datetime: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def open_application(self, context: RunContext, app_name: str) -> str:
         """Open an installed application on the computer by name."""
+        # Prewarm builds the catalog; if it hasn't, the PATH and .desktop scan runs on the pool, not the event loop
+        catalog = await self._run('open_application', get_launcher_catalog)
+        target = catalog.resolve(app_name)
+        if target is None:
+            suggestions = catalog.suggestions(app_name)
+            hint = f" Did you mean {' or '.join(suggestions)}?" if suggestions else ''
+            logger.info(f"Application {app_name} is not installed")
+            raise ToolError(f"{app_name} is not installed on this computer.{hint}")
         try:
-            if sys.platform == 'darwin':  # macOS
-                app_map = {
-                    'brave': 'Brave Browser',
-                    'canva': 'Canva',
-                    'whatsapp': 'WhatsApp',
-                    'vscode': 'Visual Studio Code',
-                    'spotify': 'Spotify',
-                    'adobe premiere pro': 'Adobe Premiere Pro 2020',
-                    'adobe photoshop': 'Adobe Photoshop CC 2019',
-                    'adobe illustrator': 'Adobe Illustrator 2022',
-                    'davinci resolve': 'DaVinci Resolve',
-                    'adobe after effects': 'Adobe After Effects 2020',
-                    'cursor': 'Cursor',
-                }
-                executable = app_map.get(app_name.lower(), app_name)
-                subprocess.Popen(['open', '-a', executable])
-                logger.info(f"Opened application {app_name} on macOS")
-                return f"Successfully opened {app_name}."
-            elif sys.platform == 'win32':  # Windows
-                app_map = {
-                    'notepad': 'notepad.exe',
-                    'calculator': 'calc.exe',
-                    'brave': r'"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe"',
-                    'canva': r'"C:\Users\%USERNAME%\AppData\Local\Programs\Canva\Canva.exe"',
-                    'whatsapp': r'"C:\Users\%USERNAME%\AppData\Local\WhatsApp\WhatsApp.exe"',
-                    'vscode': r'"C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe"',
-                    'spotify': r'"C:\Users\%USERNAME%\AppData\Roaming\Spotify\Spotify.exe"',
-                    'adobe premiere pro': r'"C:\Program Files\Adobe\Adobe Premiere Pro 2020\Adobe Premiere Pro.exe"',
-                    'adobe photoshop': r'"C:\Program Files\Adobe\Adobe Photoshop CC 2019\Photoshop.exe"',
-                    'adobe illustrator': r'"C:\Program Files\Adobe\Adobe Illustrator 2022\Support Files\Contents\Windows\Illustrator.exe"',
-                    'davinci resolve': r'"C:\Program Files\Blackmagic Design\DaVinci Resolve\Resolve.exe"',
-                    'adobe after effects': r'"C:\Program Files\Adobe\Adobe After Effects 2020\Support Files\AfterFX.exe"',
-                    'cursor': r'"C:\Users\%USERNAME%\AppData\Local\Programs\Cursor\Cursor.exe"',
-                }
-                executable = app_map.get(app_name.lower(), app_name)
-                subprocess.Popen(executable, shell=True)
-                logger.info(f"Opened application {app_name} on Windows")
-                return f"Successfully opened {app_name}."
-            else:  # Linux/other
-                app_map = {
-                    'brave': 'brave-browser',
-                    'canva': 'canva',
-                    'whatsapp': 'whatsapp-for-linux',
-                    'vscode': 'code',
-                    'spotify': 'spotify',
-                    'adobe premiere pro': 'adobe-premiere-pro',
-                    'adobe photoshop': 'adobe-photoshop',
-                    'adobe illustrator': 'adobe-illustrator',
-                    'davinci resolve': 'davinci-resolve',
-                    'adobe after effects': 'adobe-after-effects',
-                    'cursor': 'cursor',
-                }
-                executable = app_map.get(app_name.lower(), app_name)
-                subprocess.Popen([executable])
-                logger.info(f"Opened application {app_name} on Linux/other")
-                return f"Successfully opened {app_name}."
+            await self._run('open_application', catalog.launch, target)
+            logger.info(f"Opened application {app_name} via {target.argv[0]} ({target.source})")
+            return f"Successfully opened {target.name}."
         except Exception as e:
-            logger.error(f"Failed to open {app_name}: {str(e)}")
             raise ToolError(f"Failed to open {app_name}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def open_brave_url(self, context: RunContext, url: str) -> str:
         """Open a specific URL in Brave browser."""
+        catalog = await self._run('open_brave_url', get_launcher_catalog)
+        target = catalog.resolve('brave')
+        if target is None:
+            raise ToolError("Brave browser is not installed on this computer.")
         try:
-            if sys.platform == 'darwin':
-                subprocess.Popen(['open', '-a', 'Brave Browser', url])
-            elif sys.platform == 'win32':
-                brave_path = r'"C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe"'
-                subprocess.Popen(f'{brave_path} {url}', shell=True)
-            else:  # Linux/other
-                subprocess.Popen(['brave-browser', url])
+            await self._run('open_brave_url', catalog.launch, target, url)
             logger.info(f"Opened URL {url} in Brave")
             return f"Successfully opened {url} in Brave."
         except Exception as e:
-            logger.error(f"Failed to open URL {url} in Brave: {str(e)}")
             raise ToolError(f"Failed to open URL {url} in Brave: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def create_directory(self, context: RunContext, path: str) -> str:
         """Create a new folder (directory) at the specified path."""
-        try:
+        def create():
             path_obj = Path(path)
             if path_obj.exists():
                 logger.info(f"Directory {path} already exists")
                 return f"Directory {path} already exists."
-            path_obj.mkdir(parents=True, exist_ok=True)
+            with external_call('filesystem', 'mkdir'):
+                path_obj.mkdir(parents=True, exist_ok=True)
             logger.info(f"Created directory at {path}")
             return f"Successfully created directory at {path}."
+
+        try:
+            return await self._run('create_directory', create)
         except PermissionError:
-            logger.error(f"Permission denied: Cannot create directory at {path}")
             raise ToolError(f"Permission denied: Cannot create directory at {path}.")
         except Exception as e:
-            logger.error(f"Failed to create directory at {path}: {str(e)}")
             raise ToolError(f"Failed to create directory at {path}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def rename_directory(self, context: RunContext, old_path: str, new_name: str) -> str:
         """Rename a folder (directory) from old_path to new_name. new_name should be the new folder name (not a full path)."""
-        try:
+        def rename():
             old_path_obj = Path(old_path)
             if not old_path_obj.exists():
-                logger.error(f"Directory {old_path} does not exist")
                 raise ToolError(f"Directory {old_path} does not exist.")
             if not old_path_obj.is_dir():
-                logger.error(f"Path {old_path} is not a directory")
                 raise ToolError(f"Path {old_path} is not a directory.")
             new_path_obj = old_path_obj.parent / new_name
             if new_path_obj.exists():
-                logger.error(f"Directory {new_path_obj} already exists")
                 raise ToolError(f"Directory {new_path_obj} already exists.")
-            old_path_obj.rename(new_path_obj)
+            with external_call('filesystem', 'rename'):
+                old_path_obj.rename(new_path_obj)
             logger.info(f"Renamed directory from {old_path} to {new_path_obj}")
             return f"Successfully renamed directory from {old_path} to {new_path_obj}."
+
+        try:
+            return await self._run('rename_directory', rename)
+        except ToolError:
+            raise
         except PermissionError:
-            logger.error(f"Permission denied: Cannot rename directory {old_path} to {new_name}")
             raise ToolError(f"Permission denied: Cannot rename directory {old_path} to {new_name}.")
         except Exception as e:
-            logger.error(f"Failed to rename directory from {old_path} to {new_name}: {str(e)}")
             raise ToolError(f"Failed to rename directory from {old_path} to {new_name}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def delete_file(self, context: RunContext, path: str) -> str:
         """Delete a file at the specified path."""
-        try:
+        def delete():
             path_obj = Path(path)
             if not path_obj.exists():
-                logger.error(f"File {path} does not exist")
                 raise ToolError(f"File {path} does not exist.")
             if not path_obj.is_file():
-                logger.error(f"Path {path} is not a file")
                 raise ToolError(f"Path {path} is not a file.")
-            path_obj.unlink()
+            with external_call('filesystem', 'unlink'):
+                path_obj.unlink()
             logger.info(f"Deleted file at {path}")
             return f"Successfully deleted file at {path}."
+
+        try:
+            return await self._run('delete_file', delete)
+        except ToolError:
+            raise
         except PermissionError:
-            logger.error(f"Permission denied: Cannot delete file at {path}")
             raise ToolError(f"Permission denied: Cannot delete file at {path}.")
         except Exception as e:
-            logger.error(f"Failed to delete file at {path}: {str(e)}")
             raise ToolError(f"Failed to delete file at {path}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def delete_directory(self, context: RunContext, path: str) -> str:
         """Delete a folder (directory) at the specified path."""
-        try:
+        def delete():
             path_obj = Path(path)
             if not path_obj.exists():
-                logger.error(f"Directory {path} does not exist")
                 raise ToolError(f"Directory {path} does not exist.")
             if not path_obj.is_dir():
-                logger.error(f"Path {path} is not a directory")
                 raise ToolError(f"Path {path} is not a directory.")
-            shutil.rmtree(path_obj)
+            trash = get_trash()
+            with external_call('filesystem', 'stage_delete'):
+                trash.stage(str(path_obj))
             logger.info(f"Deleted directory at {path}")
-            return f"Successfully deleted directory at {path}."
+            return (f"Successfully deleted directory at {path}. Its space is reclaimed in the background, "
+                    f"and it can be restored within {trash.grace_seconds:.0f} seconds.")
+
+        try:
+            return await self._run('delete_directory', delete)
+        except ToolError:
+            raise
         except PermissionError:
-            logger.error(f"Permission denied: Cannot delete directory at {path}")
             raise ToolError(f"Permission denied: Cannot delete directory at {path}.")
         except Exception as e:
-            logger.error(f"Failed to delete directory at {path}: {str(e)}")
             raise ToolError(f"Failed to delete directory at {path}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
+    async def restore_deleted_folder(self, context: RunContext, path: str = '') -> str:
+        """Undo a recent folder deletion; restores the given path, or the latest deletion if no path is given."""
+        def restore():
+            trash = get_trash()
+            item = trash.find(path or None)
+            if item is None:
+                target = path or 'recently deleted folder'
+                raise ToolError(f"No {target} can be restored; it may already have been cleaned up.")
+            with external_call('filesystem', 'restore'):
+                return trash.restore(item.item_id)
+
+        try:
+            restored = await self._run('restore_deleted_folder', restore)
+            logger.info(f"Restored directory at {restored}")
+            return f"Successfully restored {restored}."
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to restore {path or 'the latest deletion'}: {str(e)}")
+
+    @instrumented_tool()
+    async def get_deletion_status(self, context: RunContext) -> str:
+        """Report cleanup progress and reclaimed space for recently deleted folders."""
+        items = get_trash().items()
+        if not items:
+            return "No folders have been deleted recently."
+        lines = [item.describe() for item in items[-10:]]
+        lines.append(f"Total reclaimed: {format_bytes(get_trash().stats['bytes_reclaimed'])}.")
+        return '\n'.join(lines)
+
+    @instrumented_tool()
+    async def batch_file_operations(self, context: RunContext, operations: list[FileOperation]) -> str:
+        """Create, rename, move or delete several files and folders in one step. All operations are checked first, and if one fails the completed ones are undone."""
+        def run():
+            with external_call('filesystem', 'batch'):
+                return get_file_batch().run(operations)
+
+        try:
+            summary = await self._run('batch_file_operations', run)
+            logger.info(f"Batch file operations: {summary}")
+            return summary
+        except BatchValidationError as e:
+            raise ToolError(f"Nothing was changed. {str(e)}")
+        except Exception as e:
+            raise ToolError(f"Failed to run batch file operations: {str(e)}")
+
+    @instrumented_tool()
     async def locate_file_or_folder(self, context: RunContext, name: str) -> str:
         """Locate a file or folder by name on the computer."""
+        def locate():
+            with external_call('filesystem', 'index_lookup'):
+                return [p for p in get_file_index().lookup(name) if os.path.exists(p)]
+
         try:
-            search_paths = [
-                Path.home(),  # User's home directory
-                Path.home() / 'Documents',
-                Path.home() / 'Downloads',
-                Path.home() / 'Desktop',
-            ]
-            found_paths = []
-            for search_path in search_paths:
-                for root, dirs, files in os.walk(search_path):
-                    if name in dirs or name in files:
-                        found_paths.append(str(Path(root) / name))
+            found_paths = await self._run('locate_file_or_folder', locate)
             if not found_paths:
                 logger.info(f"No file or folder named {name} found")
                 return f"No file or folder named {name} found."
+            if not any(os.path.basename(p).lower() == name.lower() for p in found_paths):
+                logger.info(f"No exact match for {name}, found {len(found_paths)} prefix matches")
+                return f"No file or folder named exactly {name}. Names starting with {name}: {', '.join(found_paths)}."
             logger.info(f"Found {name} at: {', '.join(found_paths)}")
             return f"Found {name} at: {', '.join(found_paths)}."
         except Exception as e:
-            logger.error(f"Failed to locate {name}: {str(e)}")
             raise ToolError(f"Failed to locate {name}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
+    async def search_file_contents(self, context: RunContext, query: str, folder: str = '', max_results: int = 5) -> str:
+        """Find text files whose contents mention the query, optionally only inside a folder."""
+        def search():
+            index = get_file_index()
+            if not folder:
+                paths = index.files()
+            elif index.covers(folder):
+                paths = index.files(under=folder)
+            elif os.path.isdir(os.path.expanduser(folder)):
+                paths = walk_files(os.path.expanduser(folder))
+            else:
+                raise ToolError(f"Folder {folder} does not exist.")
+            stats = {}
+            with external_call('filesystem', 'content_search'):
+                matches = list(get_content_searcher().search(query, paths, limit=max_results, stats=stats))
+            matches.sort(key=lambda m: m.score, reverse=True)
+            return matches[:max_results], stats
+
+        try:
+            matches, stats = await self._run('search_file_contents', search)
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to search file contents for {query}: {str(e)}")
+        coverage = f" (stopped after {stats['scanned']} of {stats['candidates']} files)" if stats['timed_out'] else ''
+        logger.info(f"Content search for {query} found {len(matches)} matches in {stats['scanned']} files{coverage}")
+        if not matches:
+            searched = coverage or f" in {stats['scanned']} files"
+            return f"No files mentioning {query} were found{searched}."
+        lines = [f"{m.path} (line {m.line_number}): {m.snippet}" for m in matches]
+        return f"Files mentioning {query}{coverage}:\n" + '\n'.join(lines)
+
+    @instrumented_tool()
+    async def rebuild_file_index(self, context: RunContext) -> str:
+        """Rebuild the file search index from scratch, e.g. when locate_file_or_folder misses recent changes."""
+        def rebuild():
+            index = get_file_index()
+            with external_call('filesystem', 'index_rebuild'):
+                index.invalidate()
+                index.build()
+
+        try:
+            await self._run('rebuild_file_index', rebuild)
+            logger.info("Rebuilt file index")
+            return "Successfully rebuilt the file index."
+        except Exception as e:
+            raise ToolError(f"Failed to rebuild file index: {str(e)}")
+
+    @instrumented_tool()
     async def spotify_control(self, context: RunContext, action: str) -> str:
         """Control Spotify with actions: play, pause, next, previous."""
-        try:
-            access_token = get_spotify_access_token()
-            headers = {'Authorization': f'Bearer {access_token}'}
+        async def control():
+            spotify = get_spotify_client()
             if action.lower() == 'play':
-                response = requests.put(f'{SPOTIFY_API_BASE}/me/player/play', headers=headers)
+                return await spotify.request('PUT', '/me/player/play')
             elif action.lower() == 'pause':
-                response = requests.put(f'{SPOTIFY_API_BASE}/me/player/pause', headers=headers)
+                return await spotify.request('PUT', '/me/player/pause')
             elif action.lower() == 'next':
-                response = requests.post(f'{SPOTIFY_API_BASE}/me/player/next', headers=headers)
+                return await spotify.request('POST', '/me/player/next')
             elif action.lower() == 'previous':
-                response = requests.post(f'{SPOTIFY_API_BASE}/me/player/previous', headers=headers)
+                return await spotify.request('POST', '/me/player/previous')
             else:
-                logger.error(f"Invalid Spotify action: {action}")
                 raise ToolError(f"Invalid Spotify action: {action}")
+
+        try:
+            response = await self._run('spotify_control', control)
             if response.status_code in [200, 204]:
                 logger.info(f"Spotify action {action} executed successfully")
                 return f"Spotify action {action} executed successfully."
             else:
-                logger.error(f"Failed to execute Spotify action {action}: {response.text}")
                 raise ToolError(f"Failed to execute Spotify action {action}: {response.text}")
+        except ToolError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to execute Spotify action {action}: {str(e)}")
             raise ToolError(f"Failed to execute Spotify action {action}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def spotify_search_and_play(self, context: RunContext, song_name: str) -> str:
         """Search for a song on Spotify and play it."""
-        try:
-            access_token = get_spotify_access_token()
-            headers = {'Authorization': f'Bearer {access_token}'}
-            params = {'q': song_name, 'type': 'track', 'limit': 1}
-            response = requests.get(f'{SPOTIFY_API_BASE}/search', headers=headers, params=params)
-            if response.status_code == 200:
+        async def search_and_play():
+            spotify = get_spotify_client()
+            cache = get_track_cache()
+            track = cache.get(song_name)
+            if track is None:
+                params = {'q': song_name, 'type': 'track', 'limit': SPOTIFY_SEARCH_CANDIDATES}
+                response = await spotify.request('GET', '/search', params=params)
+                if response.status_code != 200:
+                    raise ToolError(f"Failed to search for song {song_name}: {response.text}")
                 tracks = response.json().get('tracks', {}).get('items', [])
                 if not tracks:
                     logger.info(f"No tracks found for {song_name}")
                     return f"No tracks found for {song_name}."
-                track_uri = tracks[0]['uri']
-                play_response = requests.put(
-                    f'{SPOTIFY_API_BASE}/me/player/play',
-                    headers=headers,
-                    json={'uris': [track_uri]}
-                )
-                if play_response.status_code in [200, 204]:
-                    logger.info(f"Playing song {song_name} on Spotify")
-                    return f"Playing song {song_name} on Spotify."
-                else:
-                    logger.error(f"Failed to play song {song_name}: {play_response.text}")
-                    raise ToolError(f"Failed to play song {song_name}: {play_response.text}")
+                track = cache.store(song_name, tracks)
+            play_response = await spotify.request('PUT', '/me/player/play', json={'uris': [track['uri']]})
+            if play_response.status_code in [200, 204]:
+                logger.info(f"Playing song {song_name} on Spotify")
+                return f"Playing song {song_name} on Spotify."
             else:
-                logger.error(f"Failed to search for song {song_name}: {response.text}")
-                raise ToolError(f"Failed to search for song {song_name}: {response.text}")
+                raise ToolError(f"Failed to play song {song_name}: {play_response.text}")
+
+        try:
+            return await self._run('spotify_search_and_play', search_and_play)
+        except ToolError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to search and play song {song_name}: {str(e)}")
             raise ToolError(f"Failed to search and play song {song_name}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def create_calendar_event(self, context: RunContext, summary: str, start_time: str, end_time: str, description: str = '') -> str:
         """Create a Google Calendar event."""
+        def create():
+            calendar = get_calendar_client()
+            event = calendar_event_body(summary, start_time, end_time, description)
+            conflicts = calendar_conflicts(start_time, end_time)
+            event_result = calendar.execute(calendar.events().insert(calendarId='primary', body=event))
+            update_calendar_mirror(changed=[event_result])
+            return event_result, conflicts
+
         try:
-            service = get_calendar_service()
-            event = {
-                'summary': summary,
-                'description': description,
-                'start': {'dateTime': start_time, 'timeZone': 'UTC'},
-                'end': {'dateTime': end_time, 'timeZone': 'UTC'},
-            }
-            event_result = service.events().insert(calendarId='primary', body=event).execute()
+            event_result, conflicts = await self._run('create_calendar_event', create)
             logger.info(f"Created calendar event: {summary}")
-            return f"Successfully created event: {event_result['summary']} (ID: {event_result['id']})"
+            result = f"Successfully created event: {event_result['summary']} (ID: {event_result['id']})"
+            if conflicts:
+                result += f". Note that it overlaps with: {'; '.join(describe_event(e) for e in conflicts)}"
+            elif conflicts is None:
+                result += ". I couldn't check it against your other events yet"
+            return result
+        except ToolError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to create calendar event {summary}: {str(e)}")
             raise ToolError(f"Failed to create calendar event {summary}: {str(e)}")
 
-    @function_tool()
+    @instrumented_tool()
     async def delete_calendar_event(self, context: RunContext, event_id: str) -> str:
         """Delete a Google Calendar event by ID."""
+        def delete():
+            calendar = get_calendar_client()
+            calendar.execute(calendar.events().delete(calendarId='primary', eventId=event_id))
+            update_calendar_mirror(removed=[event_id])
+
         try:
-            service = get_calendar_service()
-            service.events().delete(calendarId='primary', eventId=event_id).execute()
+            await self._run('delete_calendar_event', delete)
             logger.info(f"Deleted calendar event with ID: {event_id}")
             return f"Successfully deleted calendar event with ID: {event_id}."
+        except ToolError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to delete calendar event with ID {event_id}: {str(e)}")
             raise ToolError(f"Failed to delete calendar event with ID {event_id}: {str(e)}")
 
+    @instrumented_tool()
+    async def batch_create_calendar_events(self, context: RunContext, events: list[CalendarEventSpec]) -> str:
+        """Create several Google Calendar events in one request."""
+        def create():
+            calendar = get_calendar_client()
+            requests = [
+                calendar.events().insert(
+                    calendarId='primary',
+                    body=calendar_event_body(e['summary'], e['start_time'], e['end_time'], e.get('description', '')),
+                )
+                for e in events
+            ]
+            results = calendar.execute_batch(requests)
+            update_calendar_mirror(changed=[response for response, error in results if error is None])
+            return results
+
+        try:
+            results = await self._run('batch_create_calendar_events', create)
+            labels = [
+                f"{e['summary']} (ID: {response['id']})" if response else e['summary']
+                for e, (response, _) in zip(events, results)
+            ]
+            logger.info(f"Batch created {len(events)} calendar events")
+            return format_batch_results('created', labels, results)
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to batch create calendar events: {str(e)}")
+
+    @instrumented_tool()
+    async def batch_update_calendar_events(self, context: RunContext, updates: list[CalendarEventUpdate]) -> str:
+        """Update several Google Calendar events by ID in one request. Only the given fields change."""
+        def update():
+            calendar = get_calendar_client()
+            requests = [
+                calendar.events().patch(
+                    calendarId='primary',
+                    eventId=u['event_id'],
+                    body=calendar_event_body(u.get('summary'), u.get('start_time'), u.get('end_time'), u.get('description')),
+                )
+                for u in updates
+            ]
+            results = calendar.execute_batch(requests)
+            update_calendar_mirror(changed=[response for response, error in results if error is None])
+            return results
+
+        try:
+            results = await self._run('batch_update_calendar_events', update)
+            logger.info(f"Batch updated {len(updates)} calendar events")
+            return format_batch_results('updated', [f"ID {u['event_id']}" for u in updates], results)
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to batch update calendar events: {str(e)}")
+
+    @instrumented_tool()
+    async def batch_delete_calendar_events(self, context: RunContext, event_ids: list[str]) -> str:
+        """Delete several Google Calendar events by ID in one request."""
+        def delete():
+            calendar = get_calendar_client()
+            requests = [calendar.events().delete(calendarId='primary', eventId=event_id) for event_id in event_ids]
+            results = calendar.execute_batch(requests)
+            update_calendar_mirror(removed=[event_id for event_id, (_, error) in zip(event_ids, results) if error is None])
+            return results
+
+        try:
+            results = await self._run('batch_delete_calendar_events', delete)
+            logger.info(f"Batch deleted {len(event_ids)} calendar events")
+            return format_batch_results('deleted', [f"ID {event_id}" for event_id in event_ids], results)
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to batch delete calendar events: {str(e)}")
+
+    @instrumented_tool()
+    async def check_calendar_availability(self, context: RunContext, start_time: str, end_time: str) -> str:
+        """Check whether a time range is free in Google Calendar and list any free gaps and conflicting events."""
+        def check():
+            store = synced_calendar_store()
+            if store is not None:
+                return store.overlapping(start_time, end_time), store.free_slots(start_time, end_time)
+            # The mirror's first sync is still listing the calendar; ask the API for just this range
+            busy = query_events(start_time, end_time)
+            return busy, free_gaps(busy, parse_query_time(start_time), parse_query_time(end_time))
+
+        try:
+            busy, free = await self._run('check_calendar_availability', check)
+            if not busy:
+                logger.info(f"Calendar free between {start_time} and {end_time}")
+                return f"You are free between {start_time} and {end_time}."
+            gaps = ', '.join(f"{s:%H:%M}-{e:%H:%M} UTC" for s, e in free) or 'none'
+            logger.info(f"Calendar has {len(busy)} events between {start_time} and {end_time}")
+            return f"Busy with: {'; '.join(describe_event(e) for e in busy)}. Free gaps: {gaps}."
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to check calendar availability: {str(e)}")
+
+    @instrumented_tool()
+    async def get_upcoming_calendar_events(self, context: RunContext, count: int = 1) -> str:
+        """Get the next upcoming Google Calendar events."""
+        def upcoming():
+            store = synced_calendar_store()
+            if store is not None:
+                return store.next_events(limit=count)
+            now = datetime.datetime.now(datetime.timezone.utc)
+            return [e for e in query_events(now) if e['_start'] > now][:count]
+
+        try:
+            events = await self._run('get_upcoming_calendar_events', upcoming)
+            if not events:
+                logger.info("No upcoming calendar events")
+                return "No upcoming calendar events."
+            logger.info(f"Retrieved {len(events)} upcoming calendar events")
+            return f"Upcoming: {'; '.join(describe_event(e) for e in events)}."
+        except ToolError:
+            raise
+        except Exception as e:
+            raise ToolError(f"Failed to get upcoming calendar events: {str(e)}")
+
+def collect_component_metrics():
+    """Scrape-time samples from the shared clients and the tool pools."""
+    samples = [(
+        'jarvis_tool_queue_depth', 'Blocking tool calls waiting for a pool thread.', 'gauge',
+        {(): get_tool_executor().queue_depth()},
+    )]
+    spotify_stats = get_spotify_client().stats
+    samples.append((
+        'jarvis_spotify_token_events_total', 'Spotify token cache hits, misses and refreshes.', 'counter',
+        {(('event', key),): value for key, value in spotify_stats.items()},
+    ))
+    samples.append((
+        'jarvis_spotify_track_cache_events_total', 'Spotify track cache hits, misses and expiries.', 'counter',
+        {(('event', key),): value for key, value in get_track_cache().stats.items()},
+    ))
+    samples.append((
+        'jarvis_active_sessions', 'Jobs attached to the shared services.', 'gauge',
+        {(): get_services().active_jobs()},
+    ))
+    samples.append((
+        'jarvis_worker_load', 'Load reported to the LiveKit dispatcher.', 'gauge',
+        {(): get_services().load()},
+    ))
+    logging_stats = log_stats()
+    samples.append((
+        'jarvis_log_records_skipped_total', 'Log records not written: dropped on a full queue or sampled out.', 'counter',
+        {(('reason', key),): logging_stats[key] for key in ('dropped', 'sampled_out')},
+    ))
+    samples.append((
+        'jarvis_log_queue_depth', 'Log records waiting for the writer thread.', 'gauge',
+        {(): logging_stats['queued']},
+    ))
+    samples.append((
+        'jarvis_memory_items', 'Memories about the user in the memory store.', 'gauge',
+        {(): len(get_memory_store())},
+    ))
+    trash = get_trash()
+    samples.append((
+        'jarvis_trash_pending_items', 'Deleted folders staged or still being reclaimed.', 'gauge',
+        {(): trash.pending()},
+    ))
+    samples.append((
+        'jarvis_trash_reclaimed_bytes_total', 'Bytes freed by background deletion.', 'counter',
+        {(): trash.stats['bytes_reclaimed']},
+    ))
+    return samples
+
+if not SEARCH_WORKER_IMPORT:
+    registry.add_collector(collect_component_metrics)
+
+def prewarm(proc: agents.JobProcess):
+    """Load shared clients, tokens and indexes once per worker process, before any job arrives."""
+    started = time.perf_counter()
+    configure_logging(LOG_FIELDS)  # the worker has installed its log handlers by now
+    proc.userdata['noise_cancellation'] = noise_cancellation.BVC()
+    get_services().warm()
+    proc.userdata['prewarm_seconds'] = time.perf_counter() - started
+    startup_latency.observe(IMPORT_SECONDS, 'import')
+    startup_latency.observe(proc.userdata['prewarm_seconds'], 'prewarm')
+    logger.info(f"Worker prewarmed in {proc.userdata['prewarm_seconds'] * 1000:.0f} ms (imports took {IMPORT_SECONDS * 1000:.0f} ms)")
+
+def report_startup(ctx, timings):
+    """Log the import, prewarm and first-reply breakdown for a job."""
+    for phase, seconds in timings.items():
+        startup_latency.observe(seconds, phase)
+    prewarm_seconds = ctx.proc.userdata.get('prewarm_seconds')
+    prewarm_text = f"{prewarm_seconds * 1000:.0f} ms" if prewarm_seconds is not None else "skipped"
+    logger.info(
+        f"Startup timing for job {ctx.job.id}: import {IMPORT_SECONDS * 1000:.0f} ms, prewarm {prewarm_text}, "
+        + ', '.join(f"{phase.replace('_', ' ')} {seconds * 1000:.0f} ms" for phase, seconds in timings.items())
+    )
+
 async def entrypoint(ctx: agents.JobContext):
+    dispatched = time.perf_counter()
+    current_job.set(ctx.job.id)
+    current_session.set(ctx.room.name)
+    start_metrics_server()
+    services = get_services().attach(ctx.job.id)
+
+    async def release_services(reason):
+        await services.release(ctx.job.id)
+        drop_session_trace(ctx.room.name)
+        registry.drop('job', ctx.job.id)  # the worker outlives its jobs; their series would pile up
+
+    ctx.add_shutdown_callback(release_services)
+    timings = {}
+    transcript_tasks = set()  # keeps memory updates referenced until they finish
+
     session = AgentSession(
         llm=google.beta.realtime.RealtimeModel(
             model="gemini-2.0-flash-exp",
             voice="Puck",
             temperature=0.8,
-            instructions=AGENT_INSTRUCTION,
         ),
     )
 
+    @session.on("agent_state_changed")
+    def on_agent_state_changed(ev):
+        if ev.new_state == 'speaking' and 'dispatch_to_first_audio' not in timings:
+            timings['dispatch_to_first_audio'] = time.perf_counter() - dispatched
+            report_startup(ctx, timings)
+
+    assistant = Assistant()
+
+    @session.on("user_input_transcribed")
+    def on_user_input_transcribed(ev):
+        if ev.is_final and ev.transcript.strip():
+            transcript_tasks.add(task := asyncio.create_task(assistant.on_user_transcript(ev.transcript)))
+            task.add_done_callback(transcript_tasks.discard)
+
     await session.start(
         room=ctx.room,
-        agent=Assistant(),
+        agent=assistant,
         room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
+            noise_cancellation=ctx.proc.userdata.get('noise_cancellation') or noise_cancellation.BVC(),
         ),
     )
+    timings['dispatch_to_session_start'] = time.perf_counter() - dispatched
 
     await session.generate_reply(
-        instructions=AGENT_RESPONSE
+        instructions=GREETING_INSTRUCTION
     )
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    # Jobs run as threads of one process so they share the clients, indexes and tool pools
+    # in services.py, and load_fnc can see every session's work.
+    agents.cli.run_app(agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        load_fnc=worker_load,
+        job_executor_type=agents.JobExecutorType.THREAD,
+    ))
\ No newline at end of file
@@ -0,0 +1,280 @@
+import difflib
+import glob
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Application names the assistant knows, per platform
+APP_MAPS = {
+    'darwin': {
+        'brave': 'Brave Browser',
+        'canva': 'Canva',
+        'whatsapp': 'WhatsApp',
+        'vscode': 'Visual Studio Code',
+        'spotify': 'Spotify',
+        'adobe premiere pro': 'Adobe Premiere Pro 2020',
+        'adobe photoshop': 'Adobe Photoshop CC 2019',
+        'adobe illustrator': 'Adobe Illustrator 2022',
+        'davinci resolve': 'DaVinci Resolve',
+        'adobe after effects': 'Adobe After Effects 2020',
+        'cursor': 'Cursor',
+    },
+    'win32': {
+        'notepad': 'notepad.exe',
+        'calculator': 'calc.exe',
+        'brave': r'C:\Program Files\BraveSoftware\Brave-Browser\Application\brave.exe',
+        'canva': r'C:\Users\%USERNAME%\AppData\Local\Programs\Canva\Canva.exe',
+        'whatsapp': r'C:\Users\%USERNAME%\AppData\Local\WhatsApp\WhatsApp.exe',
+        'vscode': r'C:\Users\%USERNAME%\AppData\Local\Programs\Microsoft VS Code\Code.exe',
+        'spotify': r'C:\Users\%USERNAME%\AppData\Roaming\Spotify\Spotify.exe',
+        'adobe premiere pro': r'C:\Program Files\Adobe\Adobe Premiere Pro 2020\Adobe Premiere Pro.exe',
+        'adobe photoshop': r'C:\Program Files\Adobe\Adobe Photoshop CC 2019\Photoshop.exe',
+        'adobe illustrator': r'C:\Program Files\Adobe\Adobe Illustrator 2022\Support Files\Contents\Windows\Illustrator.exe',
+        'davinci resolve': r'C:\Program Files\Blackmagic Design\DaVinci Resolve\Resolve.exe',
+        'adobe after effects': r'C:\Program Files\Adobe\Adobe After Effects 2020\Support Files\AfterFX.exe',
+        'cursor': r'C:\Users\%USERNAME%\AppData\Local\Programs\Cursor\Cursor.exe',
+    },
+    'linux': {
+        'brave': 'brave-browser',
+        'canva': 'canva',
+        'whatsapp': 'whatsapp-for-linux',
+        'vscode': 'code',
+        'spotify': 'spotify',
+        'adobe premiere pro': 'adobe-premiere-pro',
+        'adobe photoshop': 'adobe-photoshop',
+        'adobe illustrator': 'adobe-illustrator',
+        'davinci resolve': 'davinci-resolve',
+        'adobe after effects': 'adobe-after-effects',
+        'cursor': 'cursor',
+    },
+}
+
+# Other names people use for the apps above
+APP_ALIASES = {
+    'brave browser': 'brave',
+    'vs code': 'vscode',
+    'visual studio code': 'vscode',
+    'code': 'vscode',
+    'premiere pro': 'adobe premiere pro',
+    'premiere': 'adobe premiere pro',
+    'photoshop': 'adobe photoshop',
+    'illustrator': 'adobe illustrator',
+    'after effects': 'adobe after effects',
+    'resolve': 'davinci resolve',
+    'calc': 'calculator',
+}
+
+LAUNCHER_REFRESH_SECONDS = 300
+FUZZY_MATCH_CUTOFF = 0.75
+DESKTOP_ENTRY_DIRS = [
+    '~/.local/share/applications',
+    '/usr/local/share/applications',
+    '/usr/share/applications',
+    '/var/lib/flatpak/exports/share/applications',
+    '/var/lib/snapd/desktop/applications',
+]
+MAC_APP_DIRS = ['/Applications', '~/Applications', '/System/Applications', '/System/Applications/Utilities']
+
+
+def platform_app_map():
+    return APP_MAPS.get(sys.platform, APP_MAPS['linux'])
+
+
+class LaunchTarget:
+    """An application resolved to an absolute command line."""
+
+    def __init__(self, name, argv, source):
+        self.name = name
+        self.argv = argv
+        self.source = source
+
+    def __repr__(self):
+        return f"LaunchTarget({self.name!r}, {self.argv!r}, {self.source})"
+
+
+def scan_path():
+    """Map each executable name on PATH to its absolute path; earlier PATH entries win."""
+    executables = {}
+    extensions = [e.lower() for e in os.getenv('PATHEXT', '.EXE;.BAT;.CMD').split(';')] if sys.platform == 'win32' else None
+    for directory in os.getenv('PATH', '').split(os.pathsep):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if extensions is not None:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in extensions:
+                    continue
+                name = stem
+            try:
+                if not entry.is_file() or (extensions is None and not os.access(entry.path, os.X_OK)):
+                    continue
+            except OSError:
+                continue
+            executables.setdefault(name.lower(), entry.path)
+    return executables
+
+
+def parse_desktop_entry(path):
+    """Return (name, exec argv) from a .desktop file, or None for hidden or non-application entries."""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    in_entry = line == '[Desktop Entry]'
+                    continue
+                if in_entry and '=' in line:
+                    key, _, value = line.partition('=')
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if fields.get('Type', 'Application') != 'Application' or fields.get('Hidden') == 'true' or fields.get('NoDisplay') == 'true':
+        return None
+    if 'Name' not in fields or 'Exec' not in fields:
+        return None
+    try:
+        argv = [arg for arg in shlex.split(fields['Exec']) if not (len(arg) == 2 and arg.startswith('%'))]
+    except ValueError:
+        return None
+    return (fields['Name'], argv) if argv else None
+
+
+class LauncherCatalog:
+    """Installed applications resolved to absolute executables, built once and refreshed in the background.
+
+    Known apps and their aliases are resolved through PATH, .desktop entries
+    (Linux), .app bundles (macOS) or their install paths (Windows). Lookups
+    are exact first, then fuzzy, so a missing app is reported before any
+    process is spawned.
+    """
+
+    def __init__(self):
+        self._targets = {}
+        self._executables = {}
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._stop = threading.Event()
+
+    def build(self):
+        executables = scan_path()
+        targets = {}
+        if sys.platform == 'darwin':
+            open_cmd = executables.get('open', '/usr/bin/open')
+            for directory in MAC_APP_DIRS:
+                for bundle in glob.glob(os.path.join(os.path.expanduser(directory), '*.app')):
+                    name = os.path.splitext(os.path.basename(bundle))[0]
+                    targets[name.lower()] = LaunchTarget(name, [open_cmd, '-a', bundle], 'bundle')
+        elif sys.platform != 'win32':
+            for directory in DESKTOP_ENTRY_DIRS:
+                for path in glob.glob(os.path.join(os.path.expanduser(directory), '*.desktop')):
+                    parsed = parse_desktop_entry(path)
+                    if parsed is None:
+                        continue
+                    name, argv = parsed
+                    program = argv[0] if os.path.isabs(argv[0]) else executables.get(argv[0].lower())
+                    if program:
+                        targets.setdefault(name.lower(), LaunchTarget(name, [program] + argv[1:], 'desktop'))
+                        targets.setdefault(os.path.basename(program).lower(), targets[name.lower()])
+        for name, value in platform_app_map().items():
+            target = self._resolve_known(name, value, executables, targets)
+            if target is not None:
+                targets[name] = target
+        for alias, name in APP_ALIASES.items():
+            if name in targets:
+                targets.setdefault(alias, targets[name])
+        with self._lock:
+            self._targets = targets
+            self._executables = executables
+        logger.info(f"Launcher catalog resolved {len(targets)} applications and {len(executables)} PATH executables")
+
+    @staticmethod
+    def _resolve_known(name, value, executables, targets):
+        if sys.platform == 'darwin':
+            return targets.get(value.lower())
+        if sys.platform == 'win32':
+            path = os.path.expandvars(value)
+            if os.path.isabs(path):
+                return LaunchTarget(name, [path], 'install path') if os.path.isfile(path) else None
+            program = executables.get(os.path.splitext(path)[0].lower())
+            return LaunchTarget(name, [program], 'path') if program else None
+        program = executables.get(value.lower())
+        if program:
+            return LaunchTarget(name, [program], 'path')
+        return targets.get(value.lower())
+
+    def names(self):
+        with self._lock:
+            return sorted(self._targets)
+
+    def resolve(self, app_name):
+        """Return the LaunchTarget for an app name, or None if nothing installed matches."""
+        key = ' '.join(app_name.lower().split())
+        with self._lock:
+            targets, executables = self._targets, self._executables
+        if key in targets:
+            return targets[key]
+        if key in executables:
+            return LaunchTarget(key, [executables[key]], 'path')
+        close = difflib.get_close_matches(key, list(targets), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        return targets[close[0]] if close else None
+
+    def suggestions(self, app_name, limit=3):
+        return difflib.get_close_matches(app_name.lower(), self.names(), n=limit, cutoff=0.5)
+
+    @staticmethod
+    def launch(target, *args):
+        """Start the application directly (no shell) and detach it from the worker."""
+        options = {'stdin': subprocess.DEVNULL, 'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if sys.platform == 'win32':
+            options['creationflags'] = subprocess.DETACHED_PROCESS
+        else:
+            options['start_new_session'] = True
+        return subprocess.Popen(target.argv + list(args), **options)
+
+    def start_background_refresh(self, interval=LAUNCHER_REFRESH_SECONDS):
+        """Pick up newly installed or removed applications from a daemon thread."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.build()
+                except Exception as e:
+                    logger.error(f"Launcher catalog refresh failed: {str(e)}")
+
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=run, name='launcher-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        self._stop.set()
+
+
+_launcher_catalog = None
+_launcher_catalog_lock = threading.Lock()
+
+
+def get_launcher_catalog():
+    """Process-wide LauncherCatalog, built on first use and refreshed in the background.
+
+    A failed build raises and leaves nothing cached, so the next call tries again.
+    """
+    global _launcher_catalog
+    with _launcher_catalog_lock:
+        if _launcher_catalog is None:
+            catalog = LauncherCatalog()
+            catalog.build()
+            catalog.start_background_refresh()
+            _launcher_catalog = catalog
+        return _launcher_catalog
@@ -0,0 +1,32 @@
+"""Synthetic directory trees for the filesystem tool benchmarks."""
+import os
+import random
+
+
+def make_tree(root, files=1000, fanout=8, depth=3, file_size=256, seed=0):
+    """Create `files` files spread over a directory tree under root.
+
+    Directories branch `fanout` ways down to `depth` levels; files are
+    distributed across them round-robin. Returns the list of file paths.
+    """
+    rng = random.Random(seed)
+    dirs = [root]
+    frontier = [root]
+    for level in range(depth):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                path = os.path.join(parent, f'dir_{level}_{i}')
+                next_frontier.append(path)
+        dirs.extend(next_frontier)
+        frontier = next_frontier
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+    payload = os.urandom(file_size) if file_size else b''
+    paths = []
+    for i in range(files):
+        path = os.path.join(dirs[i % len(dirs)], f'file_{i}_{rng.randrange(10 ** 6)}.txt')
+        with open(path, 'wb') as f:
+            f.write(payload)
+        paths.append(path)
+    return paths
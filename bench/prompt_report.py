@@ -0,0 +1,60 @@
+"""Token counts of the session instructions assembled from the memory store.
+
+Compares the prompt with every memory included, as a monolithic prompt
+carries it, against what a session sends: the session-start instructions,
+then a memory note per utterance with the relevant memories not sent yet.
+Rows are cumulative, in utterance order. Uses a store seeded from
+prompt.SEED_MEMORIES unless --memory-file points at a real one.
+
+    python -m bench.prompt_report
+    python -m bench.prompt_report --memory-file jarvis_memory.json --utterance "plan my ML project"
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+from memory_store import MemoryStore, count_tokens, memory_note
+from prompt import CORE_INSTRUCTION
+
+SAMPLE_UTTERANCES = [
+    'open spotify and play some music',
+    'who created you',
+    'give me a project idea using machine learning',
+    'draw an ER diagram for a library management system',
+    'summarize this paragraph for my IEEE report',
+    'explain deadlocks for a 7-mark answer',
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--memory-file', help='memory store to report on (default: a freshly seeded one)')
+    parser.add_argument('--utterance', action='append', help='utterance to assemble instructions for (repeatable)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix='jarvis-prompt-') as workdir:
+        store = MemoryStore(args.memory_file or os.path.join(workdir, 'jarvis_memory.json'))
+        full = count_tokens(store.full_prompt(CORE_INSTRUCTION))
+        print(f"{'session so far':<52} {'memories':>8} {'tokens':>7} {'saved':>6}")
+        print(f"{f'all {len(store)} memories':<52} {len(store):>8} {full:>7} {'':>6}")
+        instructions, ids = store.instructions(CORE_INSTRUCTION)
+        sent = set(ids)
+        tokens = count_tokens(instructions)
+        print(f"{'(session start)':<52} {len(sent):>8} {tokens:>7} {1 - tokens / full:>6.0%}")
+        for utterance in args.utterance or SAMPLE_UTTERANCES:
+            fresh = [m for m in store.search(utterance) if m['id'] not in sent]
+            if fresh:
+                sent.update(m['id'] for m in fresh)
+                tokens += count_tokens(memory_note(fresh))
+            print(f"{utterance[:50]:<52} {len(sent):>8} {tokens:>7} {1 - tokens / full:>6.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
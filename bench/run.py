@@ -0,0 +1,239 @@
+"""Offline benchmarks for the Assistant tools.
+
+Drives Assistant tool methods directly (no LiveKit room or model) against
+the local Spotify and Calendar stand-ins in bench.stubs and synthetic
+filesystem trees, then reports p50/p95/p99 latency and throughput per tool
+and concurrency level.
+
+    python -m bench.run --concurrency 1,8 --iterations 200 --save bench_baseline.json
+    python -m bench.run --compare bench_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from google.oauth2.credentials import Credentials
+
+import agent
+import calendar_client
+import calendar_store
+import file_index
+import memory_store
+import spotify_client
+import track_cache
+import trash
+from bench.fs_trees import make_tree
+from bench.stubs import CalendarStub, SpotifyStub
+
+REGRESSION_THRESHOLD = 0.20  # fractional p95 increase reported as a regression
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Environment:
+    """Stub servers, synthetic trees and the process-wide clients pointed at them."""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='jarvis-bench-')
+        self.tree_root = os.path.join(self.workdir, 'tree')
+        self.scratch = os.path.join(self.workdir, 'scratch')
+        os.makedirs(self.scratch)
+        stub_options = {
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'stall_rate': args.stall_rate, 'stall_seconds': args.stall_seconds, 'seed': 1,
+        }
+        self.spotify = SpotifyStub(**stub_options).start()
+        self.calendar = CalendarStub(**stub_options).start()
+        self.files = make_tree(self.tree_root, files=args.tree_files, fanout=args.tree_fanout, depth=args.tree_depth)
+        self._counter = 0
+
+        spotify_client._spotify_client = spotify_client.SpotifyClient(
+            'bench-id', 'bench-secret', self.spotify.token_url, self.spotify.api_base)
+        calendar_client._calendar_client = calendar_client.CalendarClient(
+            credentials=Credentials(token='bench'), api_endpoint=self.calendar.url)
+        track_cache._track_cache = track_cache.TrackCache(os.path.join(self.workdir, 'spotify_track_cache.json'))
+        memory_store._memory_store = memory_store.MemoryStore(os.path.join(self.workdir, 'jarvis_memory.json'))
+        calendar_store._calendar_store = calendar_store.CalendarStore(
+            snapshot_file=os.path.join(self.workdir, 'calendar_snapshot.json.gz'))
+        calendar_store._calendar_store.ensure_synced()
+        index = file_index.FileIndex(roots=[self.tree_root], db_path=os.path.join(self.workdir, 'file_index.db'))
+        index.ensure_built()
+        file_index._file_index = index
+        trash._trash = trash.Trash(staging_root=os.path.join(self.workdir, 'trash'), grace_seconds=0)
+
+    def unique(self, prefix):
+        self._counter += 1
+        return f'{prefix}_{self._counter}'
+
+    def close(self):
+        trash.get_trash().close()
+        self.spotify.stop()
+        self.calendar.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def tool_cases(env):
+    """Map tool name -> callable returning positional args for one call (setup is not timed)."""
+    rng = random.Random(7)
+
+    def delete_directory_args():
+        path = os.path.join(env.scratch, env.unique('victim'))
+        make_tree(path, files=env.args.delete_files, fanout=4, depth=2, file_size=64)
+        return (path,)
+
+    def delete_event_args():
+        # Seeded straight into the stub so setup is immune to injected errors
+        _, event = env.calendar.do_insert({
+            'summary': 'bench delete',
+            'start': {'dateTime': '2030-01-01T09:00:00Z'},
+            'end': {'dateTime': '2030-01-01T10:00:00Z'},
+        })
+        return (event['id'],)
+
+    return {
+        'get_current_datetime': lambda: (),
+        'spotify_control': lambda: (rng.choice(['play', 'pause', 'next', 'previous']),),
+        'spotify_search_and_play': lambda: (f'song {rng.randrange(50)}',),
+        'create_calendar_event': lambda: (
+            env.unique('bench event'), '2030-01-01T09:00:00Z', '2030-01-01T10:00:00Z'),
+        'delete_calendar_event': delete_event_args,
+        'check_calendar_availability': lambda: ('2030-01-01T08:00:00Z', '2030-01-01T18:00:00Z'),
+        'locate_file_or_folder': lambda: (os.path.basename(rng.choice(env.files)),),
+        'create_directory': lambda: (os.path.join(env.scratch, env.unique('made')),),
+        'delete_directory': delete_directory_args,
+    }
+
+
+async def run_level(tool_name, make_args, concurrency, iterations):
+    """Run `iterations` calls of one tool across `concurrency` simulated sessions."""
+    latencies = []
+    errors = 0
+    remaining = iterations
+
+    async def session_worker():
+        nonlocal remaining, errors
+        assistant = agent.Assistant()
+        tool = getattr(assistant, tool_name)
+        while remaining > 0:
+            remaining -= 1
+            args = await asyncio.to_thread(make_args)
+            started = time.perf_counter()
+            try:
+                await tool(None, *args)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'tool': tool_name,
+        'concurrency': concurrency,
+        'calls': len(latencies),
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def print_table(results):
+    header = f"{'tool':32} {'conc':>5} {'calls':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['tool']:32} {r['concurrency']:>5} {r['calls']:>6} {r['errors']:>5} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['throughput_per_s']:>9.1f}")
+
+
+def compare(results, baseline_path):
+    """Print p95 changes against a saved baseline; returns True when any level regressed."""
+    with open(baseline_path) as f:
+        baseline = {(r['tool'], r['concurrency']): r for r in json.load(f)['results']}
+    regressed = False
+    print(f"\nComparison with {baseline_path} (p95):")
+    for r in results:
+        old = baseline.get((r['tool'], r['concurrency']))
+        if old is None or not old['p95_ms']:
+            continue
+        change = (r['p95_ms'] - old['p95_ms']) / old['p95_ms']
+        flag = ''
+        if change > REGRESSION_THRESHOLD:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"  {r['tool']:32} c={r['concurrency']:<4} {old['p95_ms']:9.2f} -> {r['p95_ms']:9.2f} ms ({change:+.0%}){flag}")
+    return regressed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tools', help='comma-separated tool names (default: all)')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--iterations', type=int, default=100, help='calls per tool and concurrency level')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of latency added by the API stubs')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random stub latency, up to this many seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub requests answered with 503')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='fraction of stub requests held for --stall-seconds')
+    parser.add_argument('--stall-seconds', type=float, default=5.0)
+    parser.add_argument('--tree-files', type=int, default=5000, help='files in the synthetic tree for locate_file_or_folder')
+    parser.add_argument('--tree-fanout', type=int, default=8)
+    parser.add_argument('--tree-depth', type=int, default=3)
+    parser.add_argument('--delete-files', type=int, default=200, help='files per tree removed by each delete_directory call')
+    parser.add_argument('--save', metavar='PATH', help='write results as a baseline JSON file')
+    parser.add_argument('--compare', metavar='PATH', help='compare p95 latency against a baseline JSON file')
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    env = Environment(args)
+    try:
+        cases = tool_cases(env)
+        names = args.tools.split(',') if args.tools else list(cases)
+        unknown = [name for name in names if name not in cases]
+        if unknown:
+            raise SystemExit(f"Unknown tools: {', '.join(unknown)}")
+        levels = [int(c) for c in args.concurrency.split(',')]
+        results = []
+        for name in names:
+            for concurrency in levels:
+                results.append(await run_level(name, cases[name], concurrency, args.iterations))
+        await spotify_client.get_spotify_client().close()
+    finally:
+        env.close()
+    print_table(results)
+    if args.save:
+        meta = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare and compare(results, args.compare):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,245 @@
+"""Local stand-ins for the Spotify and Google Calendar APIs used by the benchmarks."""
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import datetime
+
+from aiohttp import web
+
+
+class StubServer:
+    """Runs an aiohttp app on its own thread and event loop with injectable latency and errors.
+
+    latency is added to every request (plus up to `jitter` seconds),
+    error_rate is the fraction of requests answered with a 503, and
+    stall_rate is the fraction held for an extra `stall_seconds` (a slow
+    backend, for exercising deadlines and hedging).
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, stall_rate=0.0, stall_seconds=5.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self.requests = 0
+        self.url = None
+        self._random = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def routes(self, app):
+        raise NotImplementedError
+
+    def should_fail(self):
+        self.requests += 1
+        return self._random.random() < self.error_rate
+
+    async def delay(self):
+        wait = self.latency + self._random.uniform(0, self.jitter)
+        if self.stall_rate and self._random.random() < self.stall_rate:
+            wait += self.stall_seconds
+        if wait:
+            await asyncio.sleep(wait)
+
+    @web.middleware
+    async def _inject(self, request, handler):
+        await self.delay()
+        if self.should_fail():
+            return web.json_response({'error': {'status': 503, 'message': 'stub outage'}}, status=503)
+        return await handler(request)
+
+    def start(self):
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            app = web.Application(middlewares=[self._inject])
+            self.routes(app)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            self._loop.run_until_complete(site.start())
+            port = self._runner.addresses[0][1]
+            self.url = f'http://127.0.0.1:{port}'
+            self._ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+class SpotifyStub(StubServer):
+    """Spotify accounts token endpoint plus the player and search APIs the tools call."""
+
+    def __init__(self, token_lifetime=3600, **kwargs):
+        super().__init__(**kwargs)
+        self.token_lifetime = token_lifetime
+        self.tokens_issued = 0
+
+    @property
+    def token_url(self):
+        return f'{self.url}/api/token'
+
+    @property
+    def api_base(self):
+        return f'{self.url}/v1'
+
+    def routes(self, app):
+        app.router.add_post('/api/token', self.token)
+        app.router.add_get('/v1/search', self.search)
+        app.router.add_put('/v1/me/player/play', self.player)
+        app.router.add_put('/v1/me/player/pause', self.player)
+        app.router.add_post('/v1/me/player/next', self.player)
+        app.router.add_post('/v1/me/player/previous', self.player)
+
+    async def token(self, request):
+        self.tokens_issued += 1
+        return web.json_response({
+            'access_token': f'stub-token-{self.tokens_issued}',
+            'token_type': 'Bearer',
+            'expires_in': self.token_lifetime,
+        })
+
+    async def search(self, request):
+        query = request.query.get('q', '')
+        limit = int(request.query.get('limit', 1))
+        items = [
+            {
+                'uri': f'spotify:track:{abs(hash((query, i))) % 10 ** 8}',
+                'name': f'{query} {i}' if i else query,
+                'artists': [{'name': 'Stub Artist'}],
+            }
+            for i in range(limit)
+        ]
+        return web.json_response({'tracks': {'items': items}})
+
+    async def player(self, request):
+        return web.Response(status=204)
+
+
+class CalendarStub(StubServer):
+    """Calendar events API: insert, patch, delete, list with sync tokens, and the batch endpoint."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events = {}
+        self._ids = itertools.count(1)
+        self._sync_version = 0
+        self._changes = []  # (version, event)
+
+    def routes(self, app):
+        app.router.add_get('/calendars/{calendar}/events', self.list_events)
+        app.router.add_post('/calendars/{calendar}/events', self.insert)
+        app.router.add_patch('/calendars/{calendar}/events/{event_id}', self.patch)
+        app.router.add_put('/calendars/{calendar}/events/{event_id}', self.patch)
+        app.router.add_delete('/calendars/{calendar}/events/{event_id}', self.delete)
+        app.router.add_post('/batch/calendar/v3', self.batch)
+
+    def _record(self, event):
+        self._sync_version += 1
+        self._changes.append((self._sync_version, dict(event)))
+
+    def do_insert(self, body):
+        event = dict(body, id=f'stub{next(self._ids)}', status='confirmed')
+        self.events[event['id']] = event
+        self._record(event)
+        return 200, event
+
+    def do_patch(self, event_id, body):
+        if event_id not in self.events:
+            return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+        self.events[event_id].update(body)
+        self._record(self.events[event_id])
+        return 200, self.events[event_id]
+
+    def do_delete(self, event_id):
+        event = self.events.pop(event_id, None)
+        if event is None:
+            return 410, {'error': {'code': 410, 'message': 'Resource has been deleted'}}
+        self._record({'id': event_id, 'status': 'cancelled'})
+        return 204, None
+
+    @staticmethod
+    def _respond(status, body):
+        if body is None:
+            return web.Response(status=status)
+        return web.json_response(body, status=status)
+
+    async def insert(self, request):
+        return self._respond(*self.do_insert(await request.json()))
+
+    async def patch(self, request):
+        return self._respond(*self.do_patch(request.match_info['event_id'], await request.json()))
+
+    async def delete(self, request):
+        return self._respond(*self.do_delete(request.match_info['event_id']))
+
+    async def list_events(self, request):
+        sync_token = request.query.get('syncToken')
+        if sync_token:
+            since = int(sync_token)
+            items = [event for version, event in self._changes if version > since]
+        else:
+            items = list(self.events.values())
+        return web.json_response({
+            'items': items,
+            'nextSyncToken': str(self._sync_version),
+            'updated': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        })
+
+    async def batch(self, request):
+        boundary = request.headers['Content-Type'].split('boundary=')[1].strip('"')
+        text = await request.text()
+        parts = [p for p in text.split(f'--{boundary}') if 'Content-ID' in p]
+        out_boundary = 'stub_batch_boundary'
+        out = []
+        for part in parts:
+            content_id = re.search(r'Content-ID: <(.*?)>', part).group(1)
+            inner = part.split('\r\n\r\n', 1)[1] if '\r\n\r\n' in part else part.split('\n\n', 1)[1]
+            request_line, _, rest = inner.partition('\n')
+            method, path = request_line.split()[:2]
+            body_text = rest.split('\r\n\r\n', 1)[1] if '\r\n\r\n' in rest else rest.partition('\n\n')[2]
+            body = json.loads(body_text) if body_text.strip() else {}
+            if self.should_fail():
+                status, payload = 503, {'error': {'code': 503, 'message': 'stub outage'}}
+            else:
+                status, payload = self._dispatch(method, path.split('?')[0], body)
+            payload_text = json.dumps(payload) if payload is not None else ''
+            out.append(
+                f'--{out_boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} {"OK" if status < 300 else "Error"}\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(payload_text)}\r\n\r\n{payload_text}\r\n'
+            )
+        out.append(f'--{out_boundary}--\r\n')
+        return web.Response(
+            text=''.join(out),
+            headers={'Content-Type': f'multipart/mixed; boundary={out_boundary}'},
+        )
+
+    def _dispatch(self, method, path, body):
+        match = re.match(r'.*/calendars/[^/]+/events(?:/([^/]+))?$', path)
+        if not match:
+            return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+        event_id = match.group(1)
+        if method == 'POST' and event_id is None:
+            return self.do_insert(body)
+        if method in ('PATCH', 'PUT') and event_id:
+            return self.do_patch(event_id, body)
+        if method == 'DELETE' and event_id:
+            return self.do_delete(event_id)
+        return 405, {'error': {'code': 405, 'message': 'Method Not Allowed'}}
@@ -0,0 +1,138 @@
+"""call_async and call_sync against bench.stubs with scripted errors and stalls.
+
+    python -m pytest -q bench/test_resilience.py
+"""
+import asyncio
+import time
+import unittest
+import urllib.request
+import uuid
+
+import aiohttp
+
+import resilience
+from resilience import ServiceUnavailable, call_async, call_sync, deadline_scope, get_breaker
+from bench.stubs import SpotifyStub
+
+
+class ScriptedStub(SpotifyStub):
+    """SpotifyStub whose next requests fail ('fail') or stall ('stall') in the order scripted, then succeed."""
+
+    def __init__(self, **kwargs):
+        super().__init__(stall_seconds=5.0, **kwargs)
+        self.script = []
+        self.received = 0
+
+    async def delay(self):
+        self.received += 1
+        if self.script and self.script[0] == 'stall':
+            self.script.pop(0)
+            await asyncio.sleep(self.stall_seconds)
+
+    def should_fail(self):
+        self.requests += 1
+        if self.script and self.script[0] == 'fail':
+            self.script.pop(0)
+            return True
+        return False
+
+
+class ResilienceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = ScriptedStub().start()
+        cls.search_url = f'{cls.stub.api_base}/search?q=stub'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def setUp(self):
+        self.stub.script = []
+        self.stub.received = 0
+        self.endpoint = f'test-{uuid.uuid4().hex[:8]}'  # a fresh circuit breaker per test
+        self._backoff = resilience.backoff
+        resilience.backoff = lambda attempt: 0.01
+
+    def tearDown(self):
+        resilience.backoff = self._backoff
+
+    def fetch_sync(self, timeout):
+        with urllib.request.urlopen(self.search_url, timeout=timeout) as response:
+            return response.status
+
+    async def fetch_async(self):
+        async with aiohttp.ClientSession() as session:
+            async with session.get(self.search_url) as response:
+                return response.status
+
+    def call(self, idempotent=True, hedge=False, seconds=5.0):
+        async def run():
+            with deadline_scope(seconds):
+                return await call_async('spotify', self.endpoint, self.fetch_async, idempotent=idempotent,
+                                        hedge=hedge, retry_result=lambda status: status >= 500)
+        return asyncio.run(run())
+
+    def test_sync_retries_idempotent_call(self):
+        self.stub.script = ['fail', 'fail']
+        with deadline_scope(5.0):
+            status = call_sync('spotify', self.endpoint, self.fetch_sync, idempotent=True)
+        self.assertEqual(status, 200)
+        self.assertEqual(self.stub.received, 3)
+
+    def test_sync_does_not_retry_unsafe_call(self):
+        self.stub.script = ['fail']
+        with deadline_scope(5.0), self.assertRaises(ServiceUnavailable):
+            call_sync('spotify', self.endpoint, self.fetch_sync, idempotent=False)
+        self.assertEqual(self.stub.received, 1)
+
+    def test_async_retries_after_stall(self):
+        self.stub.script = ['stall']
+        started = time.monotonic()
+        self.assertEqual(self.call(seconds=3.0), 200)
+        self.assertEqual(self.stub.received, 2)
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_async_retries_error_response(self):
+        self.stub.script = ['fail']
+        self.assertEqual(self.call(), 200)
+        self.assertEqual(self.stub.received, 2)
+
+    def test_hedge_answers_before_stalled_attempt(self):
+        self.stub.script = ['stall']
+        started = time.monotonic()
+        self.assertEqual(self.call(hedge=True), 200)
+        self.assertEqual(self.stub.received, 2)
+        self.assertLess(time.monotonic() - started, resilience.HEDGE_AFTER_SECONDS + 1.0)
+
+    def test_breaker_opens_then_half_opens(self):
+        breaker = get_breaker('spotify', self.endpoint)
+        breaker.failure_threshold = 2
+        breaker.reset_seconds = 0.2
+        for _ in range(2):
+            self.stub.script = ['fail']
+            with self.assertRaises(ServiceUnavailable):
+                self.call(idempotent=False)
+        self.assertEqual(breaker.state, 'open')
+        received = self.stub.received
+        with self.assertRaises(ServiceUnavailable) as raised:
+            self.call()
+        self.assertIn('circuit open', raised.exception.reason)
+        self.assertEqual(self.stub.received, received)
+
+        # After reset_seconds one probe goes through; a failed probe opens the circuit again
+        time.sleep(0.25)
+        self.stub.script = ['fail']
+        with self.assertRaises(ServiceUnavailable):
+            self.call(idempotent=False)
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(self.stub.received, received + 1)
+
+        time.sleep(0.25)
+        self.assertEqual(self.call(), 200)
+        self.assertEqual(breaker.state, 'closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,277 @@
+import datetime
+import os
+import pickle
+import tempfile
+import threading
+import time
+import logging
+
+from metrics import external_call, resilience_events
+from resilience import ServiceUnavailable, call_sync, get_breaker, remaining
+
+# The Google client libraries take a few hundred milliseconds to import, so
+# they are loaded on first use rather than when the worker starts.
+
+logger = logging.getLogger(__name__)
+
+# Google Calendar API setup
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+CREDENTIALS_FILE = 'credentials.json'  # Path to Google API credentials JSON
+TOKEN_FILE = 'token.json'  # Stores OAuth tokens
+LEGACY_TOKEN_FILE = 'token.pickle'  # Migrated to TOKEN_FILE on first use
+CREDENTIAL_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+CALENDAR_BATCH_LIMIT = 50  # Calendar API maximum calls per batch request
+RETRY_STATUSES = {500, 502, 503, 504}  # the request may have been applied; retried only when idempotent
+THROTTLE_STATUSES = {429}  # the request was rejected unapplied; always safe to retry
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')  # 403s that mean throttled, not forbidden
+BATCH_MAX_ATTEMPTS = 3
+IDEMPOTENT_METHODS = {
+    'calendar.events.get', 'calendar.events.list', 'calendar.events.patch',
+    'calendar.events.update', 'calendar.events.delete',
+}
+
+
+def write_file_atomic(path, data):
+    """Write str or bytes data to path via a temporary file and rename, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as tmp:
+            tmp.write(data)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def is_throttled(error):
+    """True for an HttpError that rejected the request before it was applied (429 or a rate-limit 403)."""
+    status = error.resp.status
+    if status in THROTTLE_STATUSES:
+        return True
+    return status == 403 and any(reason in (error.content or b'') for reason in RATE_LIMIT_REASONS)
+
+
+def is_retryable(error, idempotent):
+    """True for an HttpError worth retrying: throttling always, server errors only for idempotent methods."""
+    return is_throttled(error) or (idempotent and error.resp.status in RETRY_STATUSES)
+
+
+class CalendarClient:
+    """Thread-safe Google Calendar client built once per process.
+
+    The API surface comes from a static discovery document, so building the
+    service never touches the network. Requests are executed over a
+    per-thread authorized HTTP connection because httplib2 is not thread-safe,
+    and credentials are refreshed ahead of expiry under a lock.
+    """
+
+    def __init__(self, credentials=None, token_file=TOKEN_FILE, credentials_file=CREDENTIALS_FILE, api_endpoint=None):
+        self.token_file = token_file
+        self.credentials_file = credentials_file
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._creds = credentials or self._load_credentials()
+        from googleapiclient.discovery import build_from_document
+
+        api_endpoint = api_endpoint or os.getenv('GOOGLE_CALENDAR_API_ENDPOINT')
+        client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+        self._batch_uri = f"{api_endpoint.rstrip('/')}/batch/calendar/v3" if api_endpoint else None
+        self.service = build_from_document(
+            self._discovery_document(),
+            credentials=self._creds,
+            client_options=client_options,
+        )
+
+    @staticmethod
+    def _discovery_document():
+        """Discovery document from CALENDAR_DISCOVERY_FILE, or the copy bundled with google-api-python-client."""
+        from googleapiclient.discovery_cache import get_static_doc
+
+        discovery_file = os.getenv('CALENDAR_DISCOVERY_FILE')
+        if discovery_file:
+            with open(discovery_file) as doc:
+                return doc.read()
+        return get_static_doc('calendar', 'v3')
+
+    def _load_credentials(self):
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
+        creds = None
+        if os.path.exists(self.token_file):
+            creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
+        elif os.path.exists(LEGACY_TOKEN_FILE):
+            with open(LEGACY_TOKEN_FILE, 'rb') as token:
+                creds = pickle.load(token)
+            logger.info(f"Migrating OAuth token from {LEGACY_TOKEN_FILE} to {self.token_file}")
+            self._save_credentials(creds)
+        if not creds or not (creds.valid or creds.refresh_token):
+            flow = InstalledAppFlow.from_client_secrets_file(self.credentials_file, SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save_credentials(creds)
+        return creds
+
+    def _save_credentials(self, creds):
+        write_file_atomic(self.token_file, creds.to_json())
+
+    def _ensure_fresh(self):
+        """Refresh the access token if it expires within CREDENTIAL_REFRESH_MARGIN."""
+        creds = self._creds
+        expiry = getattr(creds, 'expiry', None)
+        if creds.token and (expiry is None or expiry - datetime.datetime.utcnow() > CREDENTIAL_REFRESH_MARGIN):
+            return
+        if not getattr(creds, 'refresh_token', None):
+            return
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            expiry = creds.expiry
+            if creds.token and expiry and expiry - datetime.datetime.utcnow() > CREDENTIAL_REFRESH_MARGIN:
+                return
+            creds.refresh(Request())
+            self._save_credentials(creds)
+            logger.info("Refreshed Google Calendar credentials")
+
+    def _http(self, timeout=None):
+        """This thread's authorized connection, with socket timeouts set to timeout seconds if given."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+
+            http = google_auth_httplib2.AuthorizedHttp(self._creds, http=httplib2.Http())
+            self._local.http = http
+        if timeout is not None:
+            http.http.timeout = timeout
+            for connection in http.http.connections.values():  # keep-alive connections already open
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+        return http
+
+    def events(self):
+        return self.service.events()
+
+    def execute(self, request):
+        """Execute an API request built from this client's service.
+
+        The request runs within the current tool's deadline. Reads, patches
+        and deletes are retried on timeouts, connection errors and retryable
+        statuses, and each method has its own circuit breaker. Raises
+        ServiceUnavailable when Calendar can't answer.
+        """
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        method = request.methodId
+        attempts = []
+
+        def attempt(timeout):
+            attempts.append(timeout)
+            self._ensure_fresh()
+            try:
+                with external_call('calendar', method):
+                    return request.execute(http=self._http(timeout))
+            except HttpError as e:
+                # A retried delete whose first attempt went through
+                if method == 'calendar.events.delete' and len(attempts) > 1 and e.resp.status in (404, 410):
+                    return None
+                raise
+
+        idempotent = method in IDEMPOTENT_METHODS
+        return call_sync(
+            'calendar', method, attempt,
+            idempotent=idempotent,
+            retry_error=lambda e: isinstance(e, HttpError) and is_retryable(e, idempotent),
+            transport_errors=(OSError, httplib2.HttpLib2Error),
+            unsent_errors=(httplib2.ServerNotFoundError, ConnectionRefusedError),
+        )
+
+    def _new_batch(self, callback):
+        from googleapiclient.http import BatchHttpRequest
+
+        if self._batch_uri:
+            return BatchHttpRequest(callback=callback, batch_uri=self._batch_uri)
+        return self.service.new_batch_http_request(callback=callback)
+
+    def execute_batch(self, requests):
+        """Execute requests through the batch endpoint, CALENDAR_BATCH_LIMIT per HTTP call.
+
+        Returns one (response, error) pair per request, in order. Throttled
+        sub-requests, and idempotent ones that failed with a server error, are
+        retried on their own with backoff, up to BATCH_MAX_ATTEMPTS times and
+        within the current deadline. If a batch call fails outright or the
+        circuit is open, its sub-requests and those not yet sent get a
+        ServiceUnavailable error, and results of chunks that already went
+        through are kept. ServiceUnavailable is raised only when the circuit
+        is open before anything was sent.
+        """
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        breaker = get_breaker('calendar', 'batch')
+        results = [(None, None)] * len(requests)
+        pending = list(range(len(requests)))
+        sent = False
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            retry = []
+
+            def collect(request_id, response, exception):
+                index = int(request_id)
+                results[index] = (response, exception)
+                if isinstance(exception, HttpError) and is_retryable(
+                        exception, requests[index].methodId in IDEMPOTENT_METHODS):
+                    retry.append(index)
+
+            for start in range(0, len(pending), CALENDAR_BATCH_LIMIT):
+                chunk = pending[start:start + CALENDAR_BATCH_LIMIT]
+                batch = self._new_batch(collect)
+                for index in chunk:
+                    batch.add(requests[index], request_id=str(index))
+                failure = None
+                if not breaker.allow():
+                    resilience_events.inc('calendar', 'batch', 'short_circuit')
+                    failure = ServiceUnavailable('calendar', 'circuit open for batch')
+                else:
+                    self._ensure_fresh()
+                    try:
+                        with external_call('calendar', 'batch'):
+                            batch.execute(http=self._http(max(remaining(), 1.0)))
+                        breaker.record_success()
+                    except (OSError, httplib2.HttpLib2Error, HttpError) as e:
+                        breaker.record_failure()
+                        logger.error(f"Calendar batch request failed: {str(e)}")
+                        failure = ServiceUnavailable('calendar', str(e))
+                if failure is not None:
+                    if not sent and failure.reason.startswith('circuit open'):
+                        raise failure
+                    for index in pending[start:]:
+                        results[index] = (None, failure)
+                    return results
+                sent = True
+            pending = sorted(retry)
+            delay = 0.5 * 2 ** attempt
+            if not pending or attempt == BATCH_MAX_ATTEMPTS - 1 or delay > remaining():
+                break
+            logger.info(f"Retrying {len(pending)} failed calendar batch sub-requests")
+            resilience_events.inc('calendar', 'batch', 'retry')
+            time.sleep(delay)
+        return results
+
+
+_calendar_client = None
+_calendar_client_lock = threading.Lock()
+
+
+def get_calendar_client():
+    """Process-wide CalendarClient shared by every session in the worker."""
+    global _calendar_client
+    with _calendar_client_lock:
+        if _calendar_client is None:
+            _calendar_client = CalendarClient()
+        return _calendar_client
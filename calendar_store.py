@@ -0,0 +1,318 @@
+import bisect
+import datetime
+import gzip
+import json
+import os
+import threading
+import logging
+
+from calendar_client import get_calendar_client, write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+# Local mirror of the primary calendar
+CALENDAR_SNAPSHOT_FILE = 'calendar_snapshot.json.gz'
+CALENDAR_SYNC_SECONDS = 120
+CALENDAR_SYNC_WINDOW = datetime.timedelta(days=365)  # how far back the initial listing reaches
+
+
+def parse_event_time(value):
+    """Parse a Calendar start/end object into an aware UTC datetime."""
+    if 'dateTime' in value:
+        parsed = datetime.datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+    else:
+        parsed = datetime.datetime.fromisoformat(value['date'])
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+def parse_query_time(value):
+    """Parse an ISO timestamp from a tool argument; naive values are taken as UTC."""
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    else:
+        parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.astimezone(datetime.timezone.utc)
+
+
+def parse_event(event):
+    """A copy of a listed event with parsed '_start' and '_end', or None for a cancelled or timeless one."""
+    if event.get('status') == 'cancelled' or 'start' not in event or 'end' not in event:
+        return None
+    event = dict(event)
+    event['_start'] = parse_event_time(event['start'])
+    event['_end'] = parse_event_time(event['end'])
+    return event
+
+
+def free_gaps(events, start, end):
+    """Gaps inside [start, end) not covered by `events`, which must be in start order, as (start, end) pairs."""
+    slots = []
+    cursor = start
+    for event in events:
+        if event['_start'] > cursor:
+            slots.append((cursor, event['_start']))
+        cursor = max(cursor, event['_end'])
+    if cursor < end:
+        slots.append((cursor, end))
+    return slots
+
+
+class IntervalIndex:
+    """Events ordered by start time for fast overlap and next-event queries.
+
+    An overlap query for [start, end) bisects to the events that start before
+    `end` and only scans back as far as the longest event could reach, so it
+    touches a handful of entries instead of the whole calendar. Single
+    changes are inserted and removed in place; rebuild() is for whole
+    listings. The longest span only grows between rebuilds, which widens
+    the scan back but never misses an event.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._entries = []  # (start, end, event_id), parallel to _starts
+        self._max_span = datetime.timedelta(0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, events):
+        entries = sorted((e['_start'], e['_end'], e['id']) for e in events.values())
+        self._entries = entries
+        self._starts = [entry[0] for entry in entries]
+        self._max_span = max((end - start for start, end, _ in entries), default=datetime.timedelta(0))
+
+    def add(self, start, end, event_id):
+        i = bisect.bisect_right(self._entries, (start, end, event_id))
+        self._entries.insert(i, (start, end, event_id))
+        self._starts.insert(i, start)
+        self._max_span = max(self._max_span, end - start)
+
+    def discard(self, start, end, event_id):
+        i = bisect.bisect_left(self._entries, (start, end, event_id))
+        if i < len(self._entries) and self._entries[i] == (start, end, event_id):
+            del self._entries[i]
+            del self._starts[i]
+
+    def overlapping(self, start, end):
+        """IDs of events that intersect [start, end), in start order."""
+        hi = bisect.bisect_left(self._starts, end)
+        lo = bisect.bisect_left(self._starts, start - self._max_span)
+        return [event_id for s, e, event_id in self._entries[lo:hi] if e > start]
+
+    def starting_after(self, moment, limit=1):
+        lo = bisect.bisect_right(self._starts, moment)
+        return [event_id for _, _, event_id in self._entries[lo:lo + limit]]
+
+
+class CalendarStore:
+    """Primary-calendar mirror kept current with Calendar incremental sync.
+
+    The first sync lists every event in CALENDAR_SYNC_WINDOW; later syncs send
+    the stored syncToken and receive only what changed. The events and the
+    token are saved to a gzip JSON snapshot so a restart resumes incrementally.
+    """
+
+    def __init__(self, snapshot_file=CALENDAR_SNAPSHOT_FILE, calendar_id='primary'):
+        self.snapshot_file = snapshot_file
+        self.calendar_id = calendar_id
+        self.sync_token = None
+        self._events = {}
+        self._index = IntervalIndex()
+        self._lock = threading.RLock()
+        self._sync_thread = None
+        self._stop = threading.Event()
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_file):
+            return
+        try:
+            with gzip.open(self.snapshot_file, 'rt') as snapshot:
+                data = json.load(snapshot)
+            with self._lock:
+                self.sync_token = data.get('sync_token')
+                self._events = {}
+                for event in data.get('events', []):
+                    self._put(event, index=False)
+                self._index.rebuild(self._events)
+            logger.info(f"Loaded {len(self._events)} calendar events from snapshot")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable calendar snapshot: {str(e)}")
+
+    def _save_snapshot(self):
+        with self._lock:
+            events = [{k: v for k, v in e.items() if not k.startswith('_')} for e in self._events.values()]
+            data = json.dumps({'sync_token': self.sync_token, 'events': events}, separators=(',', ':'))
+        write_file_atomic(self.snapshot_file, gzip.compress(data.encode()))
+
+    def _put(self, event, index=True):
+        """Store or drop one event; index=False leaves the index to a rebuild() after a whole listing."""
+        self._pop(event['id'], index)
+        event = parse_event(event)
+        if event is None:
+            return
+        self._events[event['id']] = event
+        if index:
+            self._index.add(event['_start'], event['_end'], event['id'])
+
+    def _pop(self, event_id, index=True):
+        event = self._events.pop(event_id, None)
+        if event is not None and index:
+            self._index.discard(event['_start'], event['_end'], event_id)
+        return event
+
+    def apply(self, event):
+        """Record a locally created or updated event without waiting for the next sync."""
+        with self._lock:
+            self._put(event)
+
+    def remove(self, event_id):
+        with self._lock:
+            self._pop(event_id)
+
+    def sync(self):
+        """Pull changes from the Calendar API; falls back to a full listing when the token expired."""
+        from googleapiclient.errors import HttpError
+
+        calendar = get_calendar_client()
+        with self._lock:
+            sync_token = self.sync_token
+        full = sync_token is None
+        params = {'calendarId': self.calendar_id, 'singleEvents': True, 'maxResults': 2500}
+        if full:
+            time_min = datetime.datetime.now(datetime.timezone.utc) - CALENDAR_SYNC_WINDOW
+            params['timeMin'] = time_min.isoformat()
+        else:
+            params['syncToken'] = sync_token
+            params['showDeleted'] = True
+        changes = []
+        page_token = None
+        try:
+            while True:
+                response = calendar.execute(calendar.events().list(pageToken=page_token, **params))
+                changes.extend(response.get('items', []))
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as e:
+            if e.resp.status == 410 and not full:
+                logger.info("Calendar sync token expired, running a full sync")
+                with self._lock:
+                    self.sync_token = None
+                return self.sync()
+            raise
+        with self._lock:
+            if full:
+                self._events = {}
+            for event in changes:
+                self._put(event, index=not full)
+            if full:
+                self._index.rebuild(self._events)
+            self.sync_token = response.get('nextSyncToken')
+        self._save_snapshot()
+        logger.info(f"Calendar {'full' if full else 'incremental'} sync applied {len(changes)} changes")
+        return len(changes)
+
+    def ensure_synced(self):
+        if self.sync_token is None:
+            self.sync()
+
+    def overlapping(self, start, end):
+        """Events that intersect [start, end), earliest first."""
+        start, end = parse_query_time(start), parse_query_time(end)
+        with self._lock:
+            return [self._events[event_id] for event_id in self._index.overlapping(start, end)]
+
+    def next_events(self, after=None, limit=1):
+        after = parse_query_time(after) if after else datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            return [self._events[event_id] for event_id in self._index.starting_after(after, limit)]
+
+    def free_slots(self, start, end):
+        """Gaps inside [start, end) not covered by any event, as (start, end) pairs."""
+        start, end = parse_query_time(start), parse_query_time(end)
+        return free_gaps(self.overlapping(start, end), start, end)
+
+    def start_background_sync(self, interval=CALENDAR_SYNC_SECONDS):
+        """Keep the mirror current from a daemon thread."""
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sync()
+                except Exception as e:
+                    logger.error(f"Calendar background sync failed: {str(e)}")
+
+        self._stop.clear()
+        self._sync_thread = threading.Thread(target=run, name='calendar-sync', daemon=True)
+        self._sync_thread.start()
+
+    def close(self):
+        self._stop.set()
+
+
+_calendar_store = None
+_calendar_store_lock = threading.Lock()
+_initial_sync_thread = None
+
+
+def get_calendar_store():
+    """Process-wide CalendarStore, synced on first use and kept current in the background.
+
+    A failed first sync raises and leaves nothing cached, so the next call tries again.
+    """
+    global _calendar_store
+    with _calendar_store_lock:
+        if _calendar_store is None:
+            store = CalendarStore()
+            store.ensure_synced()
+            store.start_background_sync()
+            _calendar_store = store
+        return _calendar_store
+
+
+def synced_calendar_store():
+    """The CalendarStore if its first sync has finished; otherwise None, with that sync started on a thread.
+
+    For write paths that must not wait on the initial listing.
+    """
+    global _initial_sync_thread
+    if _calendar_store is not None:
+        return _calendar_store
+    with _calendar_store_lock:
+        if _initial_sync_thread is None or not _initial_sync_thread.is_alive():
+            _initial_sync_thread = threading.Thread(target=_initial_sync, name='calendar-initial-sync', daemon=True)
+            _initial_sync_thread.start()
+    return None
+
+
+def query_events(start, end=None, limit=250, calendar_id='primary'):
+    """Events intersecting [start, end) read straight from the Calendar API, earliest first.
+
+    One request with no paging, for reads that can't wait on the mirror's first sync.
+    """
+    start = parse_query_time(start)
+    end = parse_query_time(end) if end else None
+    calendar = get_calendar_client()
+    params = {'calendarId': calendar_id, 'singleEvents': True, 'orderBy': 'startTime',
+              'timeMin': start.isoformat(), 'maxResults': limit}
+    if end:
+        params['timeMax'] = end.isoformat()
+    response = calendar.execute(calendar.events().list(**params))
+    events = [event for event in map(parse_event, response.get('items', [])) if event is not None]
+    events = [e for e in events if e['_end'] > start and (end is None or e['_start'] < end)]
+    return sorted(events, key=lambda e: (e['_start'], e['_end'], e['id']))
+
+
+def _initial_sync():
+    try:
+        get_calendar_store()
+    except Exception as e:
+        logger.error(f"Calendar initial sync failed: {str(e)}")
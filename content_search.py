@@ -0,0 +1,293 @@
+import fnmatch
+import functools
+import math
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Content search over local files, used by search_file_contents
+CONTENT_SEARCH_PROCESSES = max(1, min(4, (os.cpu_count() or 2) - 1))
+CONTENT_SEARCH_CHUNK = 64  # files per worker task
+CONTENT_SEARCH_TIME_BUDGET = 20.0
+MAX_SEARCH_FILE_BYTES = 8 * 1024 * 1024
+MAX_SEARCH_CANDIDATES = 200_000
+# Loaded into the forkserver that forks the scan workers. Each worker still runs the entry script
+# (agent.py) as __mp_main__; with its heavy imports already loaded and shared copy-on-write, that is quick.
+WORKER_PRELOAD = ('livekit.agents', 'livekit.plugins.google', 'livekit.plugins.noise_cancellation')
+BINARY_SNIFF_BYTES = 8192
+SNIPPET_CHARS = 160
+DEFAULT_IGNORE_PATTERNS = (
+    '.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv', '.tox', '.cache',
+    '.jarvis-trash*', '*.pyc', '*.min.js', '*.lock',
+)
+# Never opened: binary formats that a plain-text scan cannot read
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.heic', '.psd', '.ai', '.prproj', '.aep',
+    '.mp3', '.wav', '.flac', '.m4a', '.mp4', '.mov', '.mkv', '.avi', '.webm',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.tar', '.iso', '.dmg',
+    '.exe', '.dll', '.so', '.dylib', '.o', '.a', '.class', '.jar', '.whl', '.pyc',
+    '.pdf', '.docx', '.xlsx', '.pptx', '.odt', '.db', '.sqlite', '.woff', '.woff2', '.ttf', '.otf',
+}
+# Scanned first, since they are the likeliest places for prose and notes
+TEXT_EXTENSIONS = {'.txt', '.md', '.markdown', '.rst', '.org', '.tex', '.html', '.htm', '.csv', '.json', '.yaml', '.yml'}
+STOPWORDS = {'a', 'an', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'and', 'or', 'about', 'with', 'is', 'i', 'my'}
+
+
+def query_terms(query):
+    """Lowercase search terms of a query, without stopwords and duplicates."""
+    terms = []
+    for word in re.findall(r'\w+', query.lower()):
+        if word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+@functools.lru_cache(maxsize=8)
+def ignore_regex(patterns):
+    """One compiled regex for a tuple of glob patterns, matched against a single path component."""
+    return re.compile('|'.join(fnmatch.translate(pattern) for pattern in patterns),
+                      re.IGNORECASE if os.name == 'nt' else 0)
+
+
+def is_ignored(path, patterns):
+    match = ignore_regex(tuple(patterns)).match
+    return any(match(part) for part in path.split(os.sep))
+
+
+class SearchMatch:
+    """A file containing the query, with its rank score and the first matching line."""
+
+    def __init__(self, path, score, terms_matched, line_number, snippet):
+        self.path = path
+        self.score = score
+        self.terms_matched = terms_matched
+        self.line_number = line_number
+        self.snippet = snippet
+
+    def __repr__(self):
+        return f"SearchMatch({self.path!r}, score={self.score:.1f}, line={self.line_number})"
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(term):
+    return re.compile(re.escape(term.encode()), re.IGNORECASE)
+
+
+def _snippet(data, position):
+    start = data.rfind(b'\n', 0, position) + 1
+    end = data.find(b'\n', position)
+    end = len(data) if end == -1 else end
+    start = max(start, position - SNIPPET_CHARS // 2)
+    end = min(end, start + SNIPPET_CHARS)
+    return ' '.join(data[start:end].decode('utf-8', errors='replace').split())
+
+
+def scan_file(path, terms, min_terms, max_bytes):
+    """Score one file against the terms in a worker process; returns a SearchMatch, 'skipped' or None."""
+    try:
+        size = os.path.getsize(path)
+        if size == 0 or size > max_bytes:
+            return 'skipped'
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if b'\0' in data[:BINARY_SNIFF_BYTES]:
+                return 'skipped'
+            positions = {}
+            occurrences = 0
+            for term in terms:
+                found = [m.start() for m, _ in zip(_compile(term).finditer(data), range(20))]
+                if found:
+                    positions[term] = found[0]
+                    occurrences += len(found)
+            if len(positions) < min_terms:
+                return None
+            phrase = _compile(' '.join(terms)).search(data) if len(terms) > 1 else None
+            first = phrase.start() if phrase else min(positions.values())
+            line_number = data[:first].count(b'\n') + 1
+            snippet = _snippet(data, first)
+    except (OSError, ValueError):
+        return 'skipped'
+    name = os.path.basename(path).lower()
+    score = (10 * len(positions) + 15 * bool(phrase) + 5 * sum(term in name for term in terms)
+             + math.log1p(occurrences))
+    return SearchMatch(path, score, len(positions), line_number, snippet)
+
+
+def scan_chunk(paths, terms, min_terms, max_bytes):
+    """Worker task: scan a chunk of files; returns (matches, files scanned, files skipped)."""
+    matches, scanned, skipped = [], 0, 0
+    for path in paths:
+        result = scan_file(path, terms, min_terms, max_bytes)
+        if result == 'skipped':
+            skipped += 1
+            continue
+        scanned += 1
+        if result is not None:
+            matches.append(result)
+    return matches, scanned, skipped
+
+
+def walk_files(root, ignore_patterns=DEFAULT_IGNORE_PATTERNS):
+    """Yield file paths under root with os.scandir, pruning ignored directories."""
+    ignored = ignore_regex(tuple(ignore_patterns)).match
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if ignored(entry.name):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
+
+
+def _worker_context():
+    """Start method for the scan workers: never fork, since this process already runs many threads.
+
+    forkserver, where available, forks each worker from a server process
+    that has loaded only this module and WORKER_PRELOAD. Workers still run
+    the main script as __mp_main__ before their first task, as with spawn,
+    so the entry script keeps its process-wide setup out of that import.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__, *WORKER_PRELOAD])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class ContentSearcher:
+    """Streams files containing a query, scanned in parallel by a process pool over mmapped files.
+
+    Candidates (from the file index or a directory walk) are filtered by
+    ignore patterns and binary extensions, ordered with plain-text formats
+    first and split into chunks for the pool. Matches are yielded as each
+    chunk finishes, and the scan stops once enough files contain every term
+    or the time budget runs out.
+    """
+
+    def __init__(self, processes=CONTENT_SEARCH_PROCESSES, ignore_patterns=DEFAULT_IGNORE_PATTERNS,
+                 max_file_bytes=MAX_SEARCH_FILE_BYTES, chunk_size=CONTENT_SEARCH_CHUNK):
+        self.processes = processes
+        self.ignore_patterns = tuple(ignore_patterns)
+        self.max_file_bytes = max_file_bytes
+        self.chunk_size = chunk_size
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=_worker_context())
+            return self._executor
+
+    def warm(self):
+        """Start the worker processes ahead of the first search."""
+        try:
+            self._pool().submit(os.getpid).result()
+        except Exception as e:
+            logger.error(f"Content search prewarm failed: {str(e)}")
+
+    def candidates(self, paths, deadline=None):
+        """Filter and order candidate paths for scanning, stopping early at deadline (monotonic time).
+
+        Ignore patterns are checked once per directory, not per file.
+        """
+        ignored = ignore_regex(self.ignore_patterns).match
+        ignored_dirs = {}  # parent -> True if it or one of its ancestors is ignored
+        kept = []
+        for count, path in enumerate(paths):
+            if deadline is not None and count % 4096 == 0 and time.monotonic() >= deadline:
+                logger.info(f"Content search ran out of time filtering candidates after {count} paths")
+                break
+            parent, name = os.path.split(path)
+            if os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS or ignored(name):
+                continue
+            skip = ignored_dirs.get(parent)
+            if skip is None:
+                skip = ignored_dirs[parent] = is_ignored(parent, self.ignore_patterns)
+            if skip:
+                continue
+            kept.append(path)
+            if len(kept) >= MAX_SEARCH_CANDIDATES:
+                logger.info(f"Content search capped at {MAX_SEARCH_CANDIDATES} candidate files")
+                break
+        kept.sort(key=lambda p: os.path.splitext(p)[1].lower() not in TEXT_EXTENSIONS)
+        return kept
+
+    def search(self, query, paths, limit=5, time_budget=CONTENT_SEARCH_TIME_BUDGET, stats=None):
+        """Yield SearchMatch objects as they are found; stats (a dict) receives scan counters."""
+        terms = query_terms(query)
+        stats = stats if stats is not None else {}
+        stats.update(candidates=0, scanned=0, skipped=0, complete=False, timed_out=False)
+        if not terms:
+            return
+        min_terms = max(1, math.ceil(len(terms) * 2 / 3))
+        deadline = time.monotonic() + time_budget  # filtering the candidates counts against the budget too
+        candidates = self.candidates(paths, deadline)
+        stats['candidates'] = len(candidates)
+        chunks = iter([candidates[i:i + self.chunk_size] for i in range(0, len(candidates), self.chunk_size)])
+        pool = self._pool()
+        pending = set()
+        full_matches = 0
+        try:
+            while True:
+                while len(pending) < self.processes * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.add(pool.submit(scan_chunk, chunk, terms, min_terms, self.max_file_bytes))
+                if not pending:
+                    stats['complete'] = True
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stats['timed_out'] = True
+                    return
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    matches, scanned, skipped = future.result()
+                    stats['scanned'] += scanned
+                    stats['skipped'] += skipped
+                    for match in matches:
+                        full_matches += match.terms_matched == len(terms)
+                        yield match
+                if full_matches >= limit:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+_content_searcher = None
+_content_searcher_lock = threading.Lock()
+
+
+def get_content_searcher():
+    """Process-wide ContentSearcher; its worker processes start with the first search."""
+    global _content_searcher
+    with _content_searcher_lock:
+        if _content_searcher is None:
+            _content_searcher = ContentSearcher()
+        return _content_searcher
@@ -0,0 +1,295 @@
+import os
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# On-disk filename index used by locate_file_or_folder
+FILE_INDEX_DB = 'file_index.db'
+FILE_INDEX_REFRESH_SECONDS = 60
+DEFAULT_INDEX_ROOTS = [
+    Path.home(),
+    Path.home() / 'Documents',
+    Path.home() / 'Downloads',
+    Path.home() / 'Desktop',
+]
+# Directory names never indexed (the trash staging area used by delete_directory)
+INDEX_SKIP_PREFIXES = ('.jarvis-trash',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    PRIMARY KEY (parent, name)
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_name_lower ON entries (name_lower);
+"""
+
+
+def normalize_roots(roots):
+    """Resolve the index roots and drop any root nested under another one."""
+    resolved = []
+    for root in roots:
+        path = Path(root).expanduser()
+        try:
+            path = path.resolve()
+        except OSError:
+            continue
+        if path.is_dir() and path not in resolved:
+            resolved.append(path)
+    kept = []
+    for path in sorted(resolved, key=lambda p: len(p.parts)):
+        if not any(path == root or root in path.parents for root in kept):
+            kept.append(path)
+    return kept
+
+
+def configured_roots():
+    """Index roots from JARVIS_INDEX_ROOTS (os.pathsep separated) or the defaults."""
+    env_roots = os.getenv('JARVIS_INDEX_ROOTS')
+    if env_roots:
+        return normalize_roots(p for p in env_roots.split(os.pathsep) if p)
+    return normalize_roots(DEFAULT_INDEX_ROOTS)
+
+
+def _subtree_bounds(path):
+    """Key range that matches every path strictly below the given directory."""
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class FileIndex:
+    """Filename index persisted in SQLite and refreshed from directory mtimes.
+
+    Every indexed directory records its mtime. A refresh stats each known
+    directory and rescans only those whose mtime changed, so new, removed and
+    renamed entries are picked up without walking the whole tree again.
+    """
+
+    def __init__(self, roots=None, db_path=FILE_INDEX_DB):
+        self.roots = normalize_roots(roots) if roots is not None else configured_roots()
+        self.db_path = str(db_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._refresh_thread = None
+        self._stop = threading.Event()
+        roots_key = os.pathsep.join(str(root) for root in self.roots)
+        if self._get_meta('roots') != roots_key:
+            self.invalidate()
+            self._set_meta('roots', roots_key)
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @property
+    def is_built(self):
+        return self._get_meta('built') == '1'
+
+    def invalidate(self):
+        """Drop every indexed entry; the next ensure_built() rebuilds from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM dirs')
+            self._conn.execute('DELETE FROM entries')
+            self._conn.execute("DELETE FROM meta WHERE key = 'built'")
+        logger.info("File index invalidated")
+
+    def ensure_built(self):
+        if not self.is_built:
+            self.build()
+
+    def build(self):
+        """Index every root from scratch."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute('DELETE FROM dirs')
+                self._conn.execute('DELETE FROM entries')
+                for root in self.roots:
+                    self._index_tree(str(root))
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+            count = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        logger.info(f"Built file index with {count} entries under {len(self.roots)} roots")
+
+    def _scan_dir(self, path):
+        """Return (mtime_ns, {name: is_dir}) for one directory, or None if it is unreadable."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            children = {}
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith(INDEX_SKIP_PREFIXES):
+                        continue
+                    try:
+                        children[entry.name] = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        children[entry.name] = False
+            return mtime_ns, children
+        except OSError:
+            return None
+
+    def _index_tree(self, top):
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            scanned = self._scan_dir(path)
+            if scanned is None:
+                continue
+            mtime_ns, children = scanned
+            self._conn.execute('INSERT OR REPLACE INTO dirs (path, mtime_ns) VALUES (?, ?)', (path, mtime_ns))
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO entries (parent, name, name_lower, is_dir) VALUES (?, ?, ?, ?)',
+                [(path, name, name.lower(), int(is_dir)) for name, is_dir in children.items()],
+            )
+            stack.extend(os.path.join(path, name) for name, is_dir in children.items() if is_dir)
+
+    def _remove_tree(self, path):
+        low, high = _subtree_bounds(path)
+        self._conn.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', (path, low, high))
+        self._conn.execute('DELETE FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)', (path, low, high))
+
+    def refresh(self):
+        """Rescan directories whose mtime changed since they were indexed.
+
+        Directories are statted and scanned without the lock, so lookups only
+        wait while the changes of one directory are written.
+        """
+        if not self.is_built:
+            with self._lock:
+                self.build()
+            return 0
+        with self._lock:
+            known = self._conn.execute('SELECT path, mtime_ns FROM dirs').fetchall()
+        changed = 0
+        for path, mtime_ns in known:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current == mtime_ns:
+                continue
+            scanned = self._scan_dir(path) if current is not None else None
+            with self._lock, self._conn:
+                row = self._conn.execute('SELECT mtime_ns FROM dirs WHERE path = ?', (path,)).fetchone()
+                if row is None or row[0] != mtime_ns:
+                    continue  # dropped with a removed parent, or already rescanned
+                changed += 1
+                if scanned is None:
+                    self._remove_tree(path)
+                    self._conn.execute(
+                        'DELETE FROM entries WHERE parent = ? AND name = ?',
+                        (os.path.dirname(path), os.path.basename(path)),
+                    )
+                    continue
+                self._apply_changes(path, *scanned)
+        if changed:
+            logger.info(f"File index refreshed {changed} changed directories")
+        return changed
+
+    def _apply_changes(self, path, mtime_ns, children):
+        stored = dict(self._conn.execute('SELECT name, is_dir FROM entries WHERE parent = ?', (path,)).fetchall())
+        for name, was_dir in stored.items():
+            if name not in children or bool(was_dir) != children[name]:
+                self._conn.execute('DELETE FROM entries WHERE parent = ? AND name = ?', (path, name))
+                if was_dir:
+                    self._remove_tree(os.path.join(path, name))
+        for name, is_dir in children.items():
+            if name in stored and bool(stored[name]) == is_dir:
+                continue
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (parent, name, name_lower, is_dir) VALUES (?, ?, ?, ?)',
+                (path, name, name.lower(), int(is_dir)),
+            )
+            if is_dir:
+                self._index_tree(os.path.join(path, name))
+        self._conn.execute('UPDATE dirs SET mtime_ns = ? WHERE path = ?', (mtime_ns, path))
+
+    def lookup(self, name, mode='auto', limit=50):
+        """Find indexed paths by name.
+
+        mode is 'exact', 'ignore_case', 'prefix' (case-insensitive) or 'auto',
+        which tries each of those in turn and stops at the first that matches.
+        """
+        if mode == 'auto':
+            for candidate in ('exact', 'ignore_case', 'prefix'):
+                found = self.lookup(name, candidate, limit)
+                if found:
+                    return found
+            return []
+        if mode == 'exact':
+            query, args = 'SELECT parent, name FROM entries WHERE name = ?', (name,)
+        elif mode == 'ignore_case':
+            query, args = 'SELECT parent, name FROM entries WHERE name_lower = ?', (name.lower(),)
+        elif mode == 'prefix':
+            prefix = name.lower()
+            query = 'SELECT parent, name FROM entries WHERE name_lower >= ? AND name_lower < ?'
+            args = (prefix, prefix + '\U0010ffff')
+        else:
+            raise ValueError(f"Unknown lookup mode: {mode}")
+        with self._lock:
+            rows = self._conn.execute(f'{query} ORDER BY parent LIMIT ?', (*args, limit)).fetchall()
+        return [os.path.join(parent, entry) for parent, entry in rows]
+
+    def covers(self, path):
+        """True if path is inside one of the indexed roots."""
+        path = Path(path).expanduser().resolve()
+        return any(path == root or root in path.parents for root in self.roots)
+
+    def files(self, under=None):
+        """Every indexed file path, optionally only those below a directory."""
+        query, args = 'SELECT parent, name FROM entries WHERE is_dir = 0', ()
+        if under is not None:
+            under = str(Path(under).expanduser().resolve())
+            low, high = _subtree_bounds(under)
+            query += ' AND (parent = ? OR (parent >= ? AND parent < ?))'
+            args = (under, low, high)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [os.path.join(parent, entry) for parent, entry in rows]
+
+    def start_background_refresh(self, interval=FILE_INDEX_REFRESH_SECONDS):
+        """Keep the index current from a daemon thread."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"File index refresh failed: {str(e)}")
+
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=run, name='file-index-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
+
+
+_file_index = None
+_file_index_lock = threading.Lock()
+
+
+def get_file_index():
+    """Process-wide FileIndex, built on first use and refreshed in the background."""
+    global _file_index
+    with _file_index_lock:
+        if _file_index is None:
+            _file_index = FileIndex()
+            _file_index.ensure_built()
+            _file_index.start_background_refresh()
+        return _file_index
@@ -0,0 +1,258 @@
+import os
+import shutil
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from trash import get_trash
+
+logger = logging.getLogger(__name__)
+
+FS_BATCH_WORKERS = 8
+MAX_BATCH_OPERATIONS = 100
+FS_ACTIONS = ('create', 'rename', 'move', 'delete')
+
+
+class BatchValidationError(ValueError):
+    """A batch operation that cannot run; nothing has been changed."""
+
+
+class BatchStep:
+    """One validated operation with absolute source and target paths."""
+
+    def __init__(self, index, action, source, target):
+        self.index = index
+        self.action = action
+        self.source = source
+        self.target = target
+        self.wave = 0
+        self.trash_item = None  # set when a delete has been staged
+
+    @property
+    def paths(self):
+        return [p for p in (self.source, self.target) if p is not None]
+
+    def describe(self):
+        if self.action == 'create':
+            return f"create {self.target}"
+        if self.action == 'delete':
+            return f"delete {self.source}"
+        return f"{self.action} {self.source} to {self.target}"
+
+
+def _related(a, b):
+    """True if a and b are the same path or one contains the other."""
+    return a == b or a.startswith(b.rstrip(os.sep) + os.sep) or b.startswith(a.rstrip(os.sep) + os.sep)
+
+
+class _PlannedTree:
+    """The filesystem as it will look after the steps validated so far."""
+
+    def __init__(self):
+        self._overlay = {}  # path -> 'dir', None (absent) or ('disk', original path)
+
+    def _origin(self, path):
+        node, rel = path, ''
+        while True:
+            if node in self._overlay:
+                value = self._overlay[node]
+                if isinstance(value, tuple):
+                    return 'disk', os.path.join(value[1], rel) if rel else value[1]
+                return 'planned', value if not rel else None
+            parent = os.path.dirname(node)
+            if parent == node:
+                return 'disk', path
+            rel = os.path.join(os.path.basename(node), rel) if rel else os.path.basename(node)
+            node = parent
+
+    def kind(self, path):
+        where, value = self._origin(path)
+        if where == 'planned':
+            return value
+        if os.path.isdir(value):
+            return 'dir'
+        return 'file' if os.path.lexists(value) else None
+
+    def missing_parents(self, path):
+        """Folders above path that do not exist yet, outermost first."""
+        missing = []
+        path = os.path.dirname(path)
+        while self.kind(path) is None:
+            missing.append(path)
+            path = os.path.dirname(path)
+        return missing[::-1]
+
+    def create(self, path):
+        self._overlay[path] = 'dir'
+
+    def move(self, source, target):
+        where, value = self._origin(source)
+        self._overlay[target] = ('disk', value) if where == 'disk' else value
+        self._overlay[source] = None
+
+    def remove(self, path):
+        self._overlay[path] = None
+
+
+def plan(operations):
+    """Validate every operation against the planned tree and group independent steps into waves.
+
+    operations are dicts with action (create, rename, move or delete), path
+    and, for rename and move, destination. Raises BatchValidationError before
+    anything is touched.
+    """
+    if not operations:
+        raise BatchValidationError("No operations given.")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise BatchValidationError(f"At most {MAX_BATCH_OPERATIONS} operations per batch.")
+    tree = _PlannedTree()
+    steps = []
+    for index, op in enumerate(operations, 1):
+        action = str(op.get('action', '')).lower()
+        raw_path = op.get('path') or ''
+        destination = op.get('destination') or ''
+
+        def fail(reason):
+            raise BatchValidationError(f"Step {index} ({action} {raw_path}): {reason}")
+
+        if action not in FS_ACTIONS:
+            fail(f"unknown action, expected one of {', '.join(FS_ACTIONS)}")
+        if not raw_path:
+            fail("path is required")
+        path = os.path.abspath(os.path.expanduser(raw_path))
+        if action == 'create':
+            kind = tree.kind(path)
+            if kind == 'file':
+                fail("a file already exists there")
+            if kind == 'dir':
+                continue  # already there, like create_directory
+            # Missing parents get steps of their own, so creates that share one
+            # run after it rather than racing to make and undo it
+            for folder in tree.missing_parents(path) + [path]:
+                tree.create(folder)
+                steps.append(BatchStep(index, action, None, folder))
+            continue
+        if tree.kind(path) is None:
+            fail("does not exist")
+        if action == 'delete':
+            tree.remove(path)
+            steps.append(BatchStep(index, action, path, None))
+            continue
+        if not destination:
+            fail("destination is required")
+        if action == 'rename':
+            if os.sep in destination or (os.altsep and os.altsep in destination):
+                fail("destination must be a new name, not a path")
+            target = os.path.join(os.path.dirname(path), destination)
+        else:
+            target = os.path.abspath(os.path.expanduser(destination))
+            if tree.kind(target) == 'dir':
+                target = os.path.join(target, os.path.basename(path))
+            if target.startswith(path.rstrip(os.sep) + os.sep):
+                fail("cannot move a folder into itself")
+            if tree.kind(os.path.dirname(target)) != 'dir':
+                fail(f"destination folder {os.path.dirname(target)} does not exist")
+        if tree.kind(target) is not None:
+            fail(f"{target} already exists")
+        tree.move(path, target)
+        steps.append(BatchStep(index, action, path, target))
+    # A step waits for every earlier step that touches the same path or a parent or child of it
+    for i, step in enumerate(steps):
+        step.wave = 1 + max(
+            (earlier.wave for earlier in steps[:i]
+             if any(_related(a, b) for a in step.paths for b in earlier.paths)),
+            default=0,
+        )
+    return steps
+
+
+def _apply(step):
+    """Run one step; returns the callable that undoes it."""
+    if step.action == 'create':
+        os.mkdir(step.target)
+        return lambda: os.rmdir(step.target)
+    if step.action == 'delete':
+        # Held until the batch ends, so a rollback can restore it however long the batch ran
+        trash = get_trash()
+        step.trash_item = trash.stage(step.source, hold=True)
+        return lambda: trash.restore(step.trash_item.item_id)
+    if step.action == 'rename':
+        os.rename(step.source, step.target)
+        return lambda: os.rename(step.target, step.source)
+    shutil.move(step.source, step.target)
+    return lambda: shutil.move(step.target, step.source)
+
+
+class FileBatch:
+    """Runs validated steps wave by wave on a thread pool and rolls back completed steps on failure."""
+
+    def __init__(self, workers=FS_BATCH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fs-batch')
+
+    def run(self, operations):
+        """Validate and run operations; returns a summary string. Raises BatchValidationError or RuntimeError."""
+        steps = plan(operations)
+        try:
+            return self._run_waves(steps, len(operations))
+        finally:
+            trash = get_trash()
+            for step in steps:
+                if step.trash_item is not None:
+                    trash.release(step.trash_item.item_id)
+
+    def _run_waves(self, steps, requested):
+        done = []  # (step, undo) in completion order
+        for wave in sorted({step.wave for step in steps}):
+            batch = [step for step in steps if step.wave == wave]
+            futures = [(step, self._pool.submit(_apply, step)) for step in batch]
+            failure = None
+            for step, future in futures:
+                try:
+                    done.append((step, future.result()))
+                except Exception as e:
+                    failure = failure or (step, e)
+            if failure is not None:
+                step, error = failure
+                undo_errors = self._rollback(done)
+                message = (f"Step {step.index} ({step.describe()}) failed: {error}. "
+                           f"Rolled back {len(done) - len(undo_errors)} of {len(done)} completed steps.")
+                if undo_errors:
+                    message += ' Could not undo: ' + '; '.join(undo_errors) + '.'
+                raise RuntimeError(message)
+        return self.summarize(steps, requested)
+
+    @staticmethod
+    def _rollback(done):
+        errors = []
+        for step, undo in reversed(done):
+            try:
+                undo()
+            except Exception as e:
+                logger.error(f"Failed to roll back step {step.index} ({step.describe()}): {str(e)}")
+                errors.append(f"step {step.index} ({str(e)})")
+        return errors
+
+    @staticmethod
+    def summarize(steps, requested):
+        counts = {}
+        for action, index in {(step.action, step.index) for step in steps}:
+            counts[action] = counts.get(action, 0) + 1
+        verbs = {'create': 'created', 'rename': 'renamed', 'move': 'moved', 'delete': 'deleted'}
+        parts = [f"{verbs[action]} {counts[action]}" for action in FS_ACTIONS if action in counts]
+        skipped = requested - len({step.index for step in steps})
+        if skipped:
+            parts.append(f"{skipped} already existed")
+        return f"Completed {requested} operations: {', '.join(parts)}."
+
+
+_file_batch = None
+_file_batch_lock = threading.Lock()
+
+
+def get_file_batch():
+    """Process-wide FileBatch."""
+    global _file_batch
+    with _file_batch_lock:
+        if _file_batch is None:
+            _file_batch = FileBatch()
+        return _file_batch
@@ -1,33 +1,12 @@
-import os
-import pickle
 import datetime
 import logging
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+from calendar_client import get_calendar_client
 
 logging.basicConfig(level=logging.INFO)
-SCOPES = ['https://www.googleapis.com/auth/calendar']
 
 
-def get_calendar_service():
-    creds = None
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file('credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
-    service = build('calendar', 'v3', credentials=creds)
-    return service
-
 def create_calendar_event(summary, start_time, duration_hours=1):
-    service = get_calendar_service()
+    calendar = get_calendar_client()
     start = start_time.isoformat()
     end = (start_time + datetime.timedelta(hours=duration_hours)).isoformat()
     event = {
@@ -35,7 +14,7 @@ def create_calendar_event(summary, start_time, duration_hours=1):
         'start': {'dateTime': start, 'timeZone': 'Asia/Kolkata'},
         'end': {'dateTime': end, 'timeZone': 'Asia/Kolkata'},
     }
-    event = service.events().insert(calendarId='primary', body=event).execute()
+    event = calendar.execute(calendar.events().insert(calendarId='primary', body=event))
     logging.info(f"Event created: {event.get('htmlLink')}")
 
 if __name__ == "__main__":
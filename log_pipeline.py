@@ -0,0 +1,242 @@
+import atexit
+import copy
+import json
+import queue
+import sys
+import threading
+import time
+import logging
+import logging.handlers
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Records wait here for the listener thread; when it is full, new records are dropped rather than block
+LOG_QUEUE_SIZE = 10_000
+# INFO records per call site written in full each window, before only one in LOG_SAMPLE_EVERY is written
+LOG_SAMPLE_BURST = 20
+LOG_SAMPLE_WINDOW = 10.0
+LOG_SAMPLE_EVERY = 10
+# Recent records kept in memory per session; those sampling held back are written out when one of its tools fails
+SESSION_TRACE_RECORDS = 200
+SESSION_TRACE_SESSIONS = 64
+# LogRecord attributes that are not extra fields
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record, with every extra field (job, session, tool, ...) at the top level."""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """Copy context variables (e.g. the current job, session and tool) onto each record as fields."""
+
+    def __init__(self, fields):
+        super().__init__()
+        self.fields = dict(fields)
+
+    def filter(self, record):
+        for name, var in self.fields.items():
+            if not hasattr(record, name):
+                setattr(record, name, var.get())
+        return True
+
+
+class InfoSampler(logging.Filter):
+    """Pass warnings and errors; per call site, pass LOG_SAMPLE_BURST INFO records per window, then one in LOG_SAMPLE_EVERY."""
+
+    def __init__(self, burst=LOG_SAMPLE_BURST, window=LOG_SAMPLE_WINDOW, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.every = every
+        self.sampled_out = 0
+        self._sites = {}  # (path, line) -> [window start, records seen]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                site = self._sites[key] = [now, 0]
+            site[1] += 1
+            seen = site[1]
+            if seen <= self.burst:
+                return True
+            if (seen - self.burst) % self.every:
+                self.sampled_out += 1
+                record._sampled_out = True  # still in the session trace, see dump_trace
+                return False
+        record.sample_rate = 1 / self.every
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of raising or blocking."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The queue never leaves the process, so formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SessionTraceHandler(logging.Handler):
+    """Keeps the last SESSION_TRACE_RECORDS records of each session in memory, unformatted."""
+
+    def __init__(self, records=SESSION_TRACE_RECORDS, sessions=SESSION_TRACE_SESSIONS):
+        super().__init__(logging.NOTSET)
+        self.records = records
+        self.sessions = sessions
+        self._buffers = OrderedDict()  # session -> deque of records
+
+    def emit(self, record):
+        session = getattr(record, 'session', None)
+        if session in (None, 'none'):
+            return
+        with self.lock:
+            buffer = self._buffers.get(session)
+            if buffer is None:
+                buffer = self._buffers[session] = deque(maxlen=self.records)
+                while len(self._buffers) > self.sessions:
+                    self._buffers.popitem(last=False)
+            buffer.append(record)
+
+    def take(self, session):
+        """Remove and return the buffered records of a session."""
+        with self.lock:
+            return list(self._buffers.pop(session, ()))
+
+
+class LogPipeline:
+    """Root logger -> bounded queue -> listener thread -> the actual handlers.
+
+    Callers only pay for filtering and a queue put; formatting and stream
+    writes happen on the listener thread. Handlers found on the root logger
+    (LiveKit installs its own when the worker starts) are moved behind the
+    queue, so their formatting and output are kept. Before any are found,
+    records are written to stderr as JSON lines.
+    """
+
+    def __init__(self, fields, level=logging.INFO):
+        self.level = level
+        self.queue = queue.Queue(LOG_QUEUE_SIZE)
+        self.context = ContextFilter(fields)
+        self.sampler = InfoSampler()
+        self.queue_handler = NonBlockingQueueHandler(self.queue)
+        self.queue_handler.addFilter(self.context)
+        self.queue_handler.addFilter(self.sampler)
+        self.trace_handler = SessionTraceHandler()
+        self.trace_handler.addFilter(self.context)
+        self._default_sink = logging.StreamHandler(sys.stderr)
+        self._default_sink.setFormatter(JsonLineFormatter())
+        self.sinks = []
+        self.listener = logging.handlers.QueueListener(self.queue, respect_handler_level=True)
+        self.listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def adopt(self, root):
+        """Put the root logger's current handlers behind the queue."""
+        found = [h for h in root.handlers if h not in (self.queue_handler, self.trace_handler)]
+        for handler in found:
+            root.removeHandler(handler)
+        self.sinks = [h for h in self.sinks if h is not self._default_sink] + found
+        self.listener.handlers = tuple(self.sinks or [self._default_sink])
+        for handler in (self.trace_handler, self.queue_handler):
+            if handler not in root.handlers:
+                root.addHandler(handler)
+        if root.level == logging.NOTSET or root.level > self.level:
+            root.setLevel(self.level)
+
+    def dump_trace(self, session, reason):
+        """Write out the session's buffered records that sampling held back, marked with the reason.
+
+        Together with the records already written, this gives the session's
+        full recent trace.
+        """
+        records = [r for r in self.trace_handler.take(session) if getattr(r, '_sampled_out', False)]
+        for record in records:
+            record = copy.copy(record)
+            record.trace = reason
+            self.queue_handler.enqueue(record)
+        return len(records)
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'dropped': self.queue_handler.dropped,
+            'sampled_out': self.sampler.sampled_out,
+        }
+
+    def close(self):
+        """Flush the queue and stop the listener thread."""
+        if not self._closed:
+            self._closed = True
+            self.listener.stop()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_logging(fields=None, level=logging.INFO):
+    """Send all logging through the process-wide LogPipeline; fields maps record attribute -> ContextVar.
+
+    Safe to call again: handlers added to the root logger since the last
+    call are moved behind the queue too.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline(fields or {}, level)
+        _pipeline.adopt(logging.getLogger())
+        return _pipeline
+
+
+def log_stats():
+    """Queue depth and counts of records dropped on a full queue or sampled out."""
+    if _pipeline is None:
+        return {'queued': 0, 'dropped': 0, 'sampled_out': 0}
+    return _pipeline.stats()
+
+
+def dump_session_trace(session, reason):
+    """Write out the recent records of a session, e.g. when one of its tools fails; returns how many."""
+    if _pipeline is None:
+        return 0
+    return _pipeline.dump_trace(session, reason)
+
+
+def drop_session_trace(session):
+    """Forget a finished session's buffered records."""
+    if _pipeline is not None:
+        _pipeline.trace_handler.take(session)
@@ -0,0 +1,312 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import logging
+from collections import Counter
+
+from calendar_client import write_file_atomic
+from content_search import STOPWORDS
+from prompt import SEED_MEMORIES
+
+logger = logging.getLogger(__name__)
+
+# Facts and preferences about the user, added to a session only when relevant
+MEMORY_FILE = 'jarvis_memory.json'
+MAX_MEMORIES = 500
+MEMORY_TOP_K = 4  # unpinned memories added per lookup, and at session start (most recent first)
+MEMORY_MIN_SCORE = 0.15  # cosine similarity a memory needs to be added to a session
+MEMORY_DUPLICATE_SCORE = 0.7  # a new memory this close to an old one replaces it
+MEMORY_FORGET_SCORE = 0.3
+MEMORY_SAVE_DELAY = 2.0
+MEMORY_KINDS = ('fact', 'preference', 'rule')
+MEMORY_STOPWORDS = STOPWORDS | {
+    'he', 'his', 'him', 'me', 'you', 'your', 'it', 'be', 'are', 'was', 'that', 'this', 'what', 'do', 'does',
+    'can', 'if', 'as', 'by', 'from', 'user', 'users', 'jarvis', 'please', 'want', 'wants', 'where', 'when',
+    'who', 'how', 'why', 'which', 'will', 'would', 'should', 'some', 'all', 'any', 'give', 'make', 'get',
+    'dont', 'doesnt', 'really',
+}
+
+# Things said in conversation that change the store; matched per sentence
+_FORGET_PATTERN = re.compile(r"^(?:jarvis\W+)?(?:please\s+)?forget\s+(?:that\s+|about\s+)?(?P<fact>.+)", re.IGNORECASE)
+_REMEMBER_PATTERN = re.compile(
+    r"^(?:jarvis\W+)?(?:please\s+)?(?:remember|note|keep in mind)\s+(?:that\s+)?(?P<fact>.+)", re.IGNORECASE)
+# Statements only: a sentence has to open with them, so questions like "do you know what I like" don't match
+_PREFERENCE_PATTERN = re.compile(
+    r"^(?:(?:jarvis|so|and|also|well|actually)\W+)*"
+    r"(?P<fact>(?:i\s+(?:really\s+)?(?:prefer|like|love|enjoy|hate|dislike|don't like|do not like)"
+    r"|my\s+(?:favou?rite|preferred)\s+[\w ]{1,30}?\s+is)\s+(?P<object>(?!(?:that|this|it|you|them)\b)\w.*))",
+    re.IGNORECASE,
+)
+_CALL_ME_PATTERN = re.compile(
+    r"^(?:jarvis\W+)?(?:please\s+)?(?:just\s+|you can\s+|from now on,?\s+)?call me\s+"
+    r"(?P<name>(?!(?:a|an|the|back|later|now|soon|tomorrow|when|if|at|on|in|after|before)\b)[a-z][\w.'-]*(?:\s+[a-z][\w.'-]*){0,2})$",
+    re.IGNORECASE,
+)
+# Words an object can't end on ("I like to eat", "I prefer the"): the thought was cut off
+_DANGLING_WORDS = {
+    'a', 'an', 'the', 'my', 'your', 'some', 'to', 'of', 'for', 'with', 'about', 'at', 'in', 'on', 'and', 'or',
+    'but', 'when', 'if', 'because', 'than', 'eat', 'do', 'go', 'have', 'be', 'get', 'make', 'use',
+}
+_THIRD_PERSON = [
+    (re.compile(r"\bi\s+(?:don't|do not)\s+", re.IGNORECASE), "the user doesn't "),
+    (re.compile(r"\bi\s+(?:really\s+)?(prefer|like|love|enjoy|hate|dislike|need|use|work|live|have)\b", re.IGNORECASE),
+     lambda m: f"the user {'has' if m.group(1).lower() == 'have' else m.group(1) + 's'}"),
+    (re.compile(r"\b(?:i am|i'm)\b", re.IGNORECASE), 'the user is'),
+    (re.compile(r"\bmyself\b", re.IGNORECASE), 'the user'),
+    (re.compile(r"\bmy\b", re.IGNORECASE), "the user's"),
+    (re.compile(r"\bmine\b", re.IGNORECASE), "the user's"),
+    (re.compile(r"\bme\b", re.IGNORECASE), 'the user'),
+    (re.compile(r"\bi\b", re.IGNORECASE), 'the user'),
+]
+
+
+def tokenize(text):
+    """Index terms of a text: lowercase words without stopwords, with a plural 's' stripped."""
+    terms = []
+    for word in re.findall(r'[a-z0-9]+', text.lower().replace("'s", '').replace("'", '')):
+        if word in MEMORY_STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def count_tokens(text):
+    """Rough model token count: words and punctuation marks, which tracks BPE counts for English prose."""
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def third_person(text):
+    """Rewrite a first-person statement about the user as a sentence about the user."""
+    for pattern, replacement in _THIRD_PERSON:
+        text = pattern.sub(replacement, text)
+    text = text.strip().rstrip('.!?,;')
+    return text[:1].upper() + text[1:] + '.'
+
+
+def extract_memory_updates(utterance):
+    """Memory changes stated in a user utterance, as (action, kind, text) with action 'remember' or 'forget'."""
+    updates = []
+    for sentence in re.split(r'(?<=[.!?])\s+', utterance.strip()):
+        if not sentence or sentence.endswith('?'):
+            continue
+        match = _FORGET_PATTERN.match(sentence)
+        if match:
+            updates.append(('forget', None, third_person(match.group('fact'))))
+            continue
+        match = _REMEMBER_PATTERN.match(sentence)
+        if match:
+            updates.append(('remember', 'fact', third_person(match.group('fact'))))
+            continue
+        sentence = sentence.rstrip('.!, ')
+        match = _CALL_ME_PATTERN.match(sentence)
+        if match:
+            updates.append(('remember', 'rule', f"The user wants to be called {match.group('name')}."))
+            continue
+        match = _PREFERENCE_PATTERN.match(sentence)
+        if match and match.group('object').split()[-1].lower() not in _DANGLING_WORDS:
+            updates.append(('remember', 'preference', third_person(match.group('fact'))))
+    return updates
+
+
+class MemoryStore:
+    """Memories about the user in a JSON file, with an in-process TF-IDF index for retrieval.
+
+    Pinned memories go into every session's instructions, with the
+    MEMORY_TOP_K most recently updated of the others. The rest reach a
+    session only when they are relevant to what the user says, as a short
+    memory_note(), so the prompt stays small as the store grows. The index
+    is rebuilt lazily after a change, which is cheap at MAX_MEMORIES entries.
+    """
+
+    def __init__(self, path=MEMORY_FILE, seeds=SEED_MEMORIES):
+        self.path = path
+        self._memories = {}  # id -> {'id', 'kind', 'text', 'pinned', 'updated_at'}
+        self._next_id = 1
+        self._idf = {}
+        self._vectors = None  # id -> (term weights, norm); None when stale
+        self._lock = threading.Lock()
+        self._save_timer = None
+        if not self._load():
+            for kind, text, pinned in seeds:
+                self._add(kind, text, pinned)
+            if seeds:
+                self._save_soon()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                memories = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable memory file {self.path}: {str(e)}")
+            return False
+        for memory in memories:
+            self._memories[memory['id']] = memory
+        self._next_id = max(self._memories, default=0) + 1
+        logger.info(f"Loaded {len(self._memories)} memories")
+        return True
+
+    def _add(self, kind, text, pinned=False):
+        memory = {'id': self._next_id, 'kind': kind, 'text': text, 'pinned': pinned, 'updated_at': time.time()}
+        self._memories[memory['id']] = memory
+        self._next_id += 1
+        self._vectors = None
+        return memory
+
+    def _index(self):
+        if self._vectors is None:
+            terms = {memory_id: Counter(tokenize(memory['text'])) for memory_id, memory in self._memories.items()}
+            df = Counter(term for counts in terms.values() for term in counts)
+            total = len(terms)
+            self._idf = {term: math.log((total + 1) / (count + 1)) + 1 for term, count in df.items()}
+            self._vectors = {memory_id: self._weigh(counts) for memory_id, counts in terms.items()}
+        return self._vectors
+
+    def _weigh(self, counts):
+        weights = {term: (1 + math.log(count)) * self._idf[term] for term, count in counts.items() if term in self._idf}
+        return weights, math.sqrt(sum(w * w for w in weights.values())) or 1.0
+
+    def _ranked(self, text):
+        """(score, memory) pairs for every memory sharing a term with text, best first."""
+        vectors = self._index()
+        query, query_norm = self._weigh(Counter(tokenize(text)))
+        scored = []
+        for memory_id, (weights, norm) in vectors.items():
+            dot = sum(weight * weights.get(term, 0.0) for term, weight in query.items())
+            if dot:
+                scored.append((dot / (norm * query_norm), self._memories[memory_id]))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return scored
+
+    def search(self, text, limit=MEMORY_TOP_K, min_score=MEMORY_MIN_SCORE):
+        """Unpinned memories relevant to text, best first."""
+        with self._lock:
+            ranked = self._ranked(text)
+        return [memory for score, memory in ranked if score >= min_score and not memory['pinned']][:limit]
+
+    def pinned(self):
+        with self._lock:
+            return [memory for memory in self._memories.values() if memory['pinned']]
+
+    def recent(self, limit=MEMORY_TOP_K):
+        """Unpinned memories, most recently updated first."""
+        with self._lock:
+            unpinned = [memory for memory in self._memories.values() if not memory['pinned']]
+        return sorted(unpinned, key=lambda m: m['updated_at'], reverse=True)[:limit]
+
+    def remember(self, text, kind='fact', pinned=False):
+        """Store a memory, replacing a near-duplicate; returns (memory, replaced)."""
+        if kind not in MEMORY_KINDS:
+            raise ValueError(f"Unknown memory kind {kind!r}, expected one of {', '.join(MEMORY_KINDS)}")
+        text = ' '.join(text.split())
+        with self._lock:
+            ranked = self._ranked(text)
+            if ranked and ranked[0][0] >= MEMORY_DUPLICATE_SCORE:
+                memory = ranked[0][1]
+                memory.update(text=text, kind=kind, pinned=memory['pinned'] or pinned, updated_at=time.time())
+                self._vectors = None
+                replaced = True
+            else:
+                memory = self._add(kind, text, pinned)
+                replaced = False
+            unpinned = sorted((m for m in self._memories.values() if not m['pinned']), key=lambda m: m['updated_at'])
+            for oldest in unpinned[:max(0, len(self._memories) - MAX_MEMORIES)]:
+                del self._memories[oldest['id']]
+        self._save_soon()
+        return memory, replaced
+
+    def forget(self, text):
+        """Remove the memory that best matches text; returns it, or None if nothing is close enough."""
+        with self._lock:
+            ranked = self._ranked(text)
+            if not ranked or ranked[0][0] < MEMORY_FORGET_SCORE:
+                return None
+            memory = self._memories.pop(ranked[0][1]['id'])
+            self._vectors = None
+        self._save_soon()
+        return memory
+
+    def learn_from(self, utterance, forget=True):
+        """Apply the memory changes stated in a user utterance; returns (action, memory) pairs.
+
+        With forget=False, requests to forget are left to the caller (e.g. a
+        forget_fact tool call for the same words); remembering twice is
+        harmless because near-duplicates replace each other, forgetting twice
+        is not.
+        """
+        changes = []
+        for action, kind, text in extract_memory_updates(utterance):
+            if action == 'forget':
+                if not forget:
+                    continue
+                memory = self.forget(text)
+                if memory is not None:
+                    changes.append(('forgot', memory))
+            else:
+                memory, replaced = self.remember(text, kind)
+                changes.append(('updated' if replaced else 'remembered', memory))
+        for action, memory in changes:
+            logger.info(f"Memory {memory['id']} {action}: {memory['text']}")
+        return changes
+
+    def instructions(self, core):
+        """Session-start instructions: core prompt, pinned and recent memories.
+
+        Returns (instructions, ids of the memories included).
+        """
+        memories = self.pinned() + self.recent()
+        if not memories:
+            return core, ()
+        lines = '\n'.join(f"- {memory['text']}" for memory in memories)
+        return f"{core.rstrip()}\n\nWhat you know about the user:\n{lines}\n", tuple(m['id'] for m in memories)
+
+    def full_prompt(self, core):
+        """The prompt with every memory included, as a monolithic prompt would carry it."""
+        with self._lock:
+            lines = '\n'.join(f"- {memory['text']}" for memory in self._memories.values())
+        return f"{core.rstrip()}\n\nWhat you know about the user:\n{lines}\n"
+
+    def __len__(self):
+        return len(self._memories)
+
+    def _save_soon(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(MEMORY_SAVE_DELAY, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            data = json.dumps(list(self._memories.values()), indent=1)
+        try:
+            write_file_atomic(self.path, data)
+        except OSError as e:
+            logger.error(f"Failed to save memories: {str(e)}")
+
+
+def memory_note(memories):
+    """Memories added to a running session, relevant to what the user just said."""
+    lines = '\n'.join(f"- {memory['text']}" for memory in memories)
+    return f"More of what you know about the user:\n{lines}"
+
+
+_memory_store = None
+_memory_store_lock = threading.Lock()
+
+
+def get_memory_store():
+    """Process-wide MemoryStore, loaded from MEMORY_FILE (seeded from prompt.SEED_MEMORIES if missing)."""
+    global _memory_store
+    with _memory_store_lock:
+        if _memory_store is None:
+            _memory_store = MemoryStore(os.getenv('JARVIS_MEMORY_FILE', MEMORY_FILE))
+        return _memory_store
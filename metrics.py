@@ -0,0 +1,273 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from livekit.agents import function_tool
+from livekit.agents.llm import ToolError
+
+from log_pipeline import dump_session_trace
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9464
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Labels attached to every sample recorded while a tool runs
+current_job = contextvars.ContextVar('current_job', default='none')
+current_session = contextvars.ContextVar('current_session', default='none')
+current_tool = contextvars.ContextVar('current_tool', default='none')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _drop_series(series, names, label, value):
+    """Delete the entries of `series` whose `label` is `value`; returns how many went."""
+    if label not in names:
+        return 0
+    i = names.index(label)
+    keys = [key for key in series if key[i] == value]
+    for key in keys:
+        del series[key]
+    return len(keys)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help_text, self.labels = name, help_text, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def drop(self, label, value):
+        with self._lock:
+            return _drop_series(self._values, self.labels, label, value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, values)} {value}')
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *label_values, amount=1):
+        with self._lock:
+            if label_values in self._values:  # not if the series was dropped with its job meanwhile
+                self._values[label_values] -= amount
+
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def drop(self, label, value):
+        with self._lock:
+            return _drop_series(self._series, self.labels, label, value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labels + ("le",), values + (bound,))} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels + ("le",), values + ("+Inf",))} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, values)} {series[-2]}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, values)} {series[-1]}')
+        return lines
+
+
+class Registry:
+    """Metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def drop(self, label, value):
+        """Remove every series labelled `label`=`value`, e.g. a finished job's, so they don't pile up."""
+        return sum(metric.drop(label, value) for metric in self._metrics)
+
+    def add_collector(self, collect):
+        """Register a callable returning (name, help, type, {((label, value), ...): sample}) tuples at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                samples = collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+                continue
+            for name, help_text, metric_type, values in samples:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {metric_type}')
+                for labels, value in values.items():
+                    labels = dict(labels)
+                    lines.append(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+tool_latency = registry.register(Histogram(
+    'jarvis_tool_latency_seconds', 'Tool call latency.', ('tool', 'job')))
+tool_in_flight = registry.register(Gauge(
+    'jarvis_tool_in_flight', 'Tool calls currently running.', ('tool', 'job')))
+tool_errors = registry.register(Counter(
+    'jarvis_tool_errors_total', 'Tool calls that raised, by exception type.', ('tool', 'job', 'exception')))
+external_latency = registry.register(Histogram(
+    'jarvis_external_call_seconds', 'Latency of Spotify, Calendar and filesystem calls made by tools.',
+    ('service', 'operation', 'tool', 'job')))
+startup_latency = registry.register(Histogram(
+    'jarvis_startup_seconds', 'Worker import and prewarm time, and job dispatch to session start and first audio.',
+    ('phase',), buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0)))
+external_errors = registry.register(Counter(
+    'jarvis_external_call_errors_total', 'External calls that raised, by exception type.',
+    ('service', 'operation', 'tool', 'job', 'exception')))
+resilience_events = registry.register(Counter(
+    'jarvis_resilience_events_total', 'Retries, hedged requests, hedge wins, short circuits and exhausted deadlines.',
+    ('service', 'endpoint', 'event')))
+circuit_open = registry.register(Gauge(
+    'jarvis_circuit_open', 'Whether the circuit breaker for an endpoint is open (1) or closed (0).',
+    ('service', 'endpoint')))
+
+
+@contextmanager
+def external_call(service, operation):
+    """Time one Spotify, Calendar or filesystem call as a sub-span of the running tool."""
+    labels = (service, operation, current_tool.get(), current_job.get())
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        external_errors.inc(*labels, type(e).__name__)
+        raise
+    finally:
+        external_latency.observe(time.perf_counter() - started, *labels)
+
+
+def _log_tool_failure(tool_name, error):
+    """The one log line for a failed tool call, after the session's held-back trace."""
+    dump_session_trace(current_session.get(), f"{tool_name} failed")
+    if isinstance(error, ToolError):
+        # An unexpected error wrapped into a ToolError keeps its traceback; a failure raised
+        # on purpose (missing file, unavailable service) needs no more than its message
+        cause = error.__context__ if error.__cause__ is None else None
+        logger.error(f"Tool {tool_name} failed: {error.message}", exc_info=cause)
+    else:
+        logger.error(f"Tool {tool_name} failed: {str(error) or type(error).__name__}", exc_info=error)
+
+
+def instrumented(fn):
+    """Record latency, in-flight count and errors for an async tool method."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        tool_token = current_tool.set(fn.__name__)
+        labels = (fn.__name__, current_job.get())
+        tool_in_flight.inc(*labels)
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        except BaseException as e:
+            tool_errors.inc(*labels, type(e).__name__)
+            if isinstance(e, Exception):
+                _log_tool_failure(fn.__name__, e)
+            raise
+        finally:
+            tool_latency.observe(time.perf_counter() - started, *labels)
+            tool_in_flight.dec(*labels)
+            current_tool.reset(tool_token)
+    return wrapper
+
+
+def instrumented_tool(**kwargs):
+    """Drop-in replacement for @function_tool() that also instruments the tool."""
+    def decorator(fn):
+        return function_tool(**kwargs)(instrumented(fn))
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(host=METRICS_HOST, port=None):
+    """Serve /metrics from a daemon thread; safe to call once per job."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        port = int(port or os.getenv('JARVIS_METRICS_PORT', METRICS_PORT))
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on {host}:{port}: {str(e)}")
+            return None
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return _server
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from livekit.agents.llm import ToolError
+
+from metrics import circuit_open, resilience_events
+
+logger = logging.getLogger(__name__)
+
+# Outbound call policy for Spotify and Calendar
+TURN_BUDGET_SECONDS = 8.0  # how long a voice turn can wait on a tool before the silence hurts
+DEFAULT_CALL_TIMEOUT = 30.0  # calls made outside a tool, e.g. prewarm and background sync
+MIN_ATTEMPT_SECONDS = 0.25  # don't start an attempt with less budget than this
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_CAP_SECONDS = 2.0
+HEDGE_AFTER_SECONDS = 0.4
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+FALLBACK_MESSAGES = {
+    'spotify': "Spotify isn't responding right now. Please try again in a minute.",
+    'calendar': "Google Calendar isn't responding right now. Please try again in a minute.",
+}
+
+# Monotonic time by which the current tool call has to finish
+call_deadline = contextvars.ContextVar('call_deadline', default=None)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """Give outbound calls inside the block at most `seconds`, never extending an outer deadline."""
+    deadline = time.monotonic() + seconds
+    current = call_deadline.get()
+    token = call_deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        call_deadline.reset(token)
+
+
+def remaining():
+    """Seconds left in the current deadline, or DEFAULT_CALL_TIMEOUT outside any."""
+    deadline = call_deadline.get()
+    return DEFAULT_CALL_TIMEOUT if deadline is None else deadline - time.monotonic()
+
+
+def attempt_budget(budget, attempt, idempotent):
+    """Time for attempt number `attempt`: retryable calls split what is left over the remaining attempts."""
+    if not idempotent:
+        return budget
+    return max(budget / (MAX_ATTEMPTS - attempt + 1), min(budget, MIN_ATTEMPT_SECONDS))
+
+
+def backoff(attempt):
+    """Full-jitter exponential backoff before retry number attempt + 1."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class ServiceUnavailable(ToolError):
+    """A provider is down, too slow for the turn, or short-circuited; the message is safe to speak."""
+
+    def __init__(self, service, reason):
+        super().__init__(FALLBACK_MESSAGES.get(service, f"{service} isn't responding right now."))
+        self.service = service
+        self.reason = reason
+
+
+class RetryableResponse(Exception):
+    """A response whose status says the call should be retried (429 or 5xx)."""
+
+    def __init__(self, response):
+        super().__init__(f"retryable response {getattr(response, 'status_code', response)}")
+        self.response = response
+
+
+class CircuitBreaker:
+    """Opens after consecutive failed calls and lets one probe through after reset_seconds."""
+
+    def __init__(self, service, endpoint, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.service = service
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'closed':
+                return True
+            # A probe that never reported back (e.g. it raised something unrelated) is replaced after reset_seconds
+            if self.state == 'half_open' and (not self._probing or time.monotonic() - self._probe_started >= self.reset_seconds):
+                self._probing = True
+                self._probe_started = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"Circuit for {self.service} {self.endpoint} closed")
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+        circuit_open.set(self.service, self.endpoint, value=0)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.error(f"Circuit for {self.service} {self.endpoint} opened after {self.failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+        if self.state == 'open':
+            circuit_open.set(self.service, self.endpoint, value=1)
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(service, endpoint):
+    with _breakers_lock:
+        breaker = _breakers.get((service, endpoint))
+        if breaker is None:
+            breaker = _breakers[(service, endpoint)] = CircuitBreaker(service, endpoint)
+        return breaker
+
+
+def _admit(service, endpoint):
+    breaker = get_breaker(service, endpoint)
+    if not breaker.allow():
+        resilience_events.inc(service, endpoint, 'short_circuit')
+        raise ServiceUnavailable(service, f"circuit open for {endpoint}")
+    return breaker
+
+
+def _give_up(service, endpoint, breaker, error, attempts):
+    breaker.record_failure()
+    logger.error(f"{service} {endpoint} failed after {attempts} attempts: {str(error) or type(error).__name__}")
+    return ServiceUnavailable(service, str(error))
+
+
+async def _hedged(service, endpoint, attempt_fn, budget, hedge_after):
+    """Run attempt_fn, and a second copy if the first has not answered after hedge_after seconds."""
+    deadline = time.monotonic() + budget
+    first = asyncio.ensure_future(attempt_fn())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=min(hedge_after, budget))
+        if not done:
+            resilience_events.inc(service, endpoint, 'hedge')
+            tasks.add(asyncio.ensure_future(attempt_fn()))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, timeout=deadline - time.monotonic(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        resilience_events.inc(service, endpoint, 'hedge_win')
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def call_async(service, endpoint, attempt_fn, idempotent=False, hedge=False, retry_result=None,
+                     transport_errors=(OSError,), unsent_errors=()):
+    """Await attempt_fn() within the current deadline, with retries, optional hedging and a circuit breaker.
+
+    Timeouts, transport_errors and results for which retry_result() is true
+    are retried with jittered backoff when the call is idempotent;
+    unsent_errors (the request never left) are retried either way. Raises
+    ServiceUnavailable when the breaker is open or the attempts run out.
+    """
+    breaker = _admit(service, endpoint)
+    error = None
+    attempt = 0
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        budget = remaining()
+        if budget < MIN_ATTEMPT_SECONDS:
+            resilience_events.inc(service, endpoint, 'deadline_exceeded')
+            error = error or asyncio.TimeoutError(f"no time left for {endpoint}")
+            break
+        budget = attempt_budget(budget, attempt, idempotent)
+        try:
+            if hedge:
+                result = await _hedged(service, endpoint, attempt_fn, budget, HEDGE_AFTER_SECONDS)
+            else:
+                result = await asyncio.wait_for(attempt_fn(), budget)
+        except unsent_errors as e:
+            error, retryable = e, True
+        except (asyncio.TimeoutError, *transport_errors) as e:
+            error, retryable = e, idempotent
+        else:
+            if retry_result is None or not retry_result(result):
+                breaker.record_success()
+                return result
+            error, retryable = RetryableResponse(result), idempotent
+        if not retryable or attempt == MAX_ATTEMPTS:
+            break
+        delay = backoff(attempt - 1)
+        if delay > remaining() - MIN_ATTEMPT_SECONDS:
+            break
+        resilience_events.inc(service, endpoint, 'retry')
+        await asyncio.sleep(delay)
+    raise _give_up(service, endpoint, breaker, error, attempt) from error
+
+
+def call_sync(service, endpoint, attempt_fn, idempotent=False, retry_error=None,
+              transport_errors=(OSError,), unsent_errors=()):
+    """Blocking counterpart of call_async for thread-pool work; attempt_fn(timeout) must honour timeout.
+
+    Exceptions for which retry_error() is true (e.g. 429/5xx) count like
+    transport errors; any other exception means the service answered and is
+    raised unchanged.
+    """
+    breaker = _admit(service, endpoint)
+    error = None
+    attempt = 0
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        budget = remaining()
+        if budget < MIN_ATTEMPT_SECONDS:
+            resilience_events.inc(service, endpoint, 'deadline_exceeded')
+            error = error or TimeoutError(f"no time left for {endpoint}")
+            break
+        try:
+            result = attempt_fn(attempt_budget(budget, attempt, idempotent))
+        except unsent_errors as e:
+            error, retryable = e, True
+        except transport_errors as e:
+            error, retryable = e, idempotent
+        except Exception as e:
+            if retry_error is None or not retry_error(e):
+                breaker.record_success()
+                raise
+            error, retryable = e, idempotent
+        else:
+            breaker.record_success()
+            return result
+        if not retryable or attempt == MAX_ATTEMPTS:
+            break
+        delay = backoff(attempt - 1)
+        if delay > remaining() - MIN_ATTEMPT_SECONDS:
+            break
+        resilience_events.inc(service, endpoint, 'retry')
+        time.sleep(delay)
+    raise _give_up(service, endpoint, breaker, error, attempt) from error
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import logging
+
+from app_launcher import get_launcher_catalog
+from calendar_client import TOKEN_FILE, get_calendar_client
+from calendar_store import synced_calendar_store
+from content_search import get_content_searcher
+from file_index import get_file_index
+from memory_store import get_memory_store
+from metrics import tool_in_flight
+from spotify_client import get_spotify_client
+from tool_executor import get_tool_executor
+from track_cache import get_track_cache
+from trash import get_trash
+
+logger = logging.getLogger(__name__)
+
+# Worker capacity used to turn activity into a 0-1 load for the LiveKit dispatcher
+MAX_SESSIONS_PER_WORKER = 8
+QUEUED_TOOLS_AT_FULL_LOAD = 8
+
+
+class SharedServices:
+    """Lifecycle of the clients and indexes every job in the worker process shares.
+
+    The shared objects are the process-wide get_*() singletons, which tools
+    use directly; this warms them at prewarm and tracks the jobs using them.
+    Jobs attach when they start and release when they shut down; releasing
+    only drops what belongs to the job's own event loop (its Spotify
+    connection pool). The attached jobs, in-flight tools and pool queue depth
+    also give the worker's load.
+    """
+
+    def __init__(self):
+        self._jobs = {}  # job id -> attach time
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Build everything a first tool call would otherwise wait for; slow pieces finish on threads."""
+        get_tool_executor()
+        get_spotify_client()
+        get_track_cache()
+        get_memory_store()
+        get_launcher_catalog()
+        get_trash().start()  # reclaims anything a previous worker left staged
+        # Building the file index or syncing the calendar can outlast initialize_process_timeout,
+        # so they finish in the background; a job that needs them first waits on their locks.
+        threading.Thread(target=get_file_index, name='file-index-prewarm', daemon=True).start()
+        threading.Thread(target=get_content_searcher().warm, name='content-search-prewarm', daemon=True).start()
+        if os.path.exists(TOKEN_FILE):  # never start the interactive OAuth flow from prewarm
+            threading.Thread(target=self._warm_calendar, name='calendar-prewarm', daemon=True).start()
+
+    @staticmethod
+    def _warm_calendar():
+        try:
+            get_calendar_client()
+            synced_calendar_store()  # starts the first sync on the thread the calendar tools check
+        except Exception as e:
+            logger.error(f"Calendar prewarm failed: {str(e)}")
+
+    def attach(self, job_id):
+        with self._lock:
+            self._jobs[job_id] = time.monotonic()
+            active = len(self._jobs)
+        logger.info(f"Job {job_id} attached to shared services ({active} active)")
+        return self
+
+    async def release(self, job_id):
+        """Detach a job; must run on the job's event loop so its connection pool closes there."""
+        with self._lock:
+            started = self._jobs.pop(job_id, None)
+            active = len(self._jobs)
+        await get_spotify_client().release_loop()
+        if started is not None:
+            logger.info(f"Job {job_id} released shared services after {time.monotonic() - started:.0f}s ({active} active)")
+
+    def active_jobs(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def load(self):
+        """Worker load between 0 and 1: the busiest of sessions, tool pools, pool queue and CPU."""
+        executor = get_tool_executor()
+        capacity = sum(executor.pool_sizes.values())
+        max_sessions = int(os.getenv('JARVIS_MAX_SESSIONS', MAX_SESSIONS_PER_WORKER))
+        signals = [
+            self.active_jobs() / max_sessions,
+            tool_in_flight.total() / capacity,
+            executor.queue_depth() / QUEUED_TOOLS_AT_FULL_LOAD,
+        ]
+        if hasattr(os, 'getloadavg'):
+            signals.append(os.getloadavg()[0] / (os.cpu_count() or 1))
+        return min(max(signals), 1.0)
+
+
+_services = None
+_services_lock = threading.Lock()
+
+
+def get_services():
+    """Process-wide SharedServices."""
+    global _services
+    with _services_lock:
+        if _services is None:
+            _services = SharedServices()
+        return _services
+
+
+def worker_load():
+    """load_fnc for WorkerOptions."""
+    return get_services().load()
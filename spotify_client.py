@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+
+import aiohttp
+from livekit.agents.llm import ToolError
+
+from metrics import external_call
+from resilience import call_async
+
+logger = logging.getLogger(__name__)
+
+# Spotify API setup
+SPOTIFY_TOKEN_URL = 'https://accounts.spotify.com/api/token'
+SPOTIFY_API_BASE = 'https://api.spotify.com/v1'
+TOKEN_REFRESH_MARGIN = 60  # seconds before expiry at which the token is renewed
+SPOTIFY_REQUEST_TIMEOUT = 10
+SPOTIFY_POOL_SIZE = 16
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SpotifyResponse:
+    """Status and body of a completed Spotify API call."""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text) if self.text else {}
+
+
+class SpotifyClient:
+    """Spotify Web API client with a cached access token and keep-alive connections.
+
+    The client-credentials token is reused until TOKEN_REFRESH_MARGIN seconds
+    before it expires and is renewed ahead of time by a background task, so
+    tool calls normally skip the accounts round-trip. HTTP connections are
+    pooled per event loop.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, token_url=None, api_base=None):
+        self.client_id = client_id or os.getenv('SPOTIFY_CLIENT_ID')
+        self.client_secret = client_secret or os.getenv('SPOTIFY_CLIENT_SECRET')
+        self.token_url = token_url or os.getenv('SPOTIFY_TOKEN_URL', SPOTIFY_TOKEN_URL)
+        self.api_base = (api_base or os.getenv('SPOTIFY_API_BASE', SPOTIFY_API_BASE)).rstrip('/')
+        self._token = None
+        self._expires_at = 0.0
+        self._state_lock = threading.Lock()
+        self._loops = {}  # event loop -> (session, token lock, refresh task)
+        self.stats = {'token_hits': 0, 'token_misses': 0, 'token_refreshes': 0, 'refresh_failures': 0}
+
+    def _loop_state(self):
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            state = self._loops.get(loop)
+            if state is None or state['session'].closed:
+                connector = aiohttp.TCPConnector(limit=SPOTIFY_POOL_SIZE, keepalive_timeout=60)
+                state = {
+                    'session': aiohttp.ClientSession(
+                        connector=connector,
+                        timeout=aiohttp.ClientTimeout(total=SPOTIFY_REQUEST_TIMEOUT),
+                    ),
+                    'token_lock': asyncio.Lock(),
+                    'refresh_task': None,
+                }
+                self._loops[loop] = state
+            return state
+
+    def _token_fresh(self):
+        return self._token is not None and time.monotonic() < self._expires_at - TOKEN_REFRESH_MARGIN
+
+    async def access_token(self):
+        """Return a valid access token, fetching a new one only when needed."""
+        if self._token_fresh():
+            self.stats['token_hits'] += 1
+            return self._token
+        state = self._loop_state()
+        async with state['token_lock']:
+            if self._token_fresh():
+                self.stats['token_hits'] += 1
+                return self._token
+            self.stats['token_misses'] += 1
+            await self._fetch_token(state)
+            return self._token
+
+    async def _fetch_token(self, state):
+        if not self.client_id or not self.client_secret:
+            raise ToolError("Spotify client ID or secret not set in environment variables.")
+        data = {
+            'grant_type': 'client_credentials',
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+        with external_call('spotify', 'POST /api/token'):
+            async with state['session'].post(self.token_url, data=data) as response:
+                text = await response.text()
+        if response.status != 200:
+            raise ToolError(f"Failed to get Spotify access token: {text}")
+        payload = json.loads(text)
+        self._token = payload['access_token']
+        self._expires_at = time.monotonic() + int(payload.get('expires_in', 3600))
+        self.stats['token_refreshes'] += 1
+        if state['refresh_task'] is None or state['refresh_task'].done():
+            state['refresh_task'] = asyncio.create_task(self._refresh_loop(state))
+
+    async def _refresh_loop(self, state):
+        """Renew the token shortly before it expires so callers never wait on it."""
+        while not state['session'].closed:
+            await asyncio.sleep(max(self._expires_at - TOKEN_REFRESH_MARGIN - time.monotonic(), 1))
+            if self._token_fresh():
+                continue
+            try:
+                async with state['token_lock']:
+                    if not self._token_fresh():
+                        await self._fetch_token(state)
+            except Exception as e:
+                self.stats['refresh_failures'] += 1
+                logger.error(f"Background Spotify token refresh failed: {str(e)}")
+                await asyncio.sleep(5)
+
+    async def request(self, method, path, idempotent=None, **kwargs):
+        """Call the Spotify Web API and return a SpotifyResponse.
+
+        Runs within the current tool's deadline: idempotent calls (GET, PUT,
+        DELETE unless told otherwise) are retried on timeouts, connection
+        errors and 429/5xx, GETs are hedged, and every endpoint has its own
+        circuit breaker. Raises ServiceUnavailable when Spotify can't answer.
+        """
+        endpoint = f'{method} {path}'
+        extra_headers = kwargs.pop('headers', {})
+
+        async def attempt():
+            token = await self.access_token()
+            headers = {'Authorization': f'Bearer {token}', **extra_headers}
+            session = self._loop_state()['session']
+            with external_call('spotify', endpoint):
+                async with session.request(method, f'{self.api_base}{path}', headers=headers, **kwargs) as response:
+                    return SpotifyResponse(response.status, await response.text())
+
+        return await call_async(
+            'spotify', endpoint, attempt,
+            idempotent=method in IDEMPOTENT_METHODS if idempotent is None else idempotent,
+            hedge=method == 'GET',
+            retry_result=lambda response: response.status_code in RETRY_STATUSES,
+            transport_errors=(aiohttp.ClientError, OSError),
+            unsent_errors=(aiohttp.ClientConnectorError,),
+        )
+
+    async def release_loop(self):
+        """Close the connection pool and token refresh task of the running event loop, e.g. when a job ends."""
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            state = self._loops.pop(loop, None)
+        if state is None:
+            return
+        if state['refresh_task'] is not None:
+            state['refresh_task'].cancel()
+        await state['session'].close()
+
+    async def close(self):
+        with self._state_lock:
+            loops, self._loops = self._loops, {}
+        for state in loops.values():
+            if state['refresh_task'] is not None:
+                state['refresh_task'].cancel()
+            await state['session'].close()
+
+
+_spotify_client = None
+_spotify_client_lock = threading.Lock()
+
+
+def get_spotify_client():
+    """Process-wide SpotifyClient shared by every session in the worker."""
+    global _spotify_client
+    with _spotify_client_lock:
+        if _spotify_client is None:
+            _spotify_client = SpotifyClient()
+        return _spotify_client
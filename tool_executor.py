@@ -0,0 +1,88 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from livekit.agents.llm import ToolError
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per tool class. Each class gets its own pool so a slow
+# Calendar call cannot starve filesystem or app-launch tools.
+TOOL_POOL_SIZES = {
+    'filesystem': 4,
+    'system': 2,
+    'calendar': 4,
+}
+DEFAULT_TOOL_TIMEOUT = 30.0
+MAX_CONCURRENT_TOOLS_PER_SESSION = 4
+
+
+class ToolExecutor:
+    """Runs blocking tool work on bounded thread pools, off the event loop."""
+
+    def __init__(self, pool_sizes=None):
+        self.pool_sizes = dict(pool_sizes or TOOL_POOL_SIZES)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, tool_class):
+        with self._lock:
+            pool = self._pools.get(tool_class)
+            if pool is None:
+                if tool_class not in self.pool_sizes:
+                    raise ValueError(f"Unknown tool class: {tool_class}")
+                pool = ThreadPoolExecutor(
+                    max_workers=self.pool_sizes[tool_class],
+                    thread_name_prefix=f'tool-{tool_class}',
+                )
+                self._pools[tool_class] = pool
+            return pool
+
+    async def run(self, tool_class, fn, *args, timeout=DEFAULT_TOOL_TIMEOUT, **kwargs):
+        """Run fn(*args, **kwargs) on the pool for tool_class and await its result.
+
+        Coroutine functions already yield to the event loop and are awaited
+        directly; pass tool_class=None for them. Raises ToolError if the call
+        does not finish within timeout seconds. A worker thread cannot be
+        interrupted, but the event loop stops waiting on it.
+        """
+        if inspect.iscoroutinefunction(fn):
+            future = fn(*args, **kwargs)
+        else:
+            # run_in_executor does not carry context variables (job and tool labels) into the thread
+            context = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._pool(tool_class), functools.partial(context.run, fn, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"{tool_class} call {getattr(fn, '__name__', fn)} timed out after {timeout}s")
+            raise ToolError(f"The operation timed out after {timeout:g} seconds.")
+
+    def queue_depth(self):
+        """Number of submitted calls still waiting for a worker thread, across all pools."""
+        with self._lock:
+            return sum(pool._work_queue.qsize() for pool in self._pools.values())
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor():
+    """Process-wide ToolExecutor shared by every session in the worker."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ToolExecutor()
+        return _executor
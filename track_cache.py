@@ -0,0 +1,136 @@
+import json
+import os
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from calendar_client import write_file_atomic
+
+logger = logging.getLogger(__name__)
+
+# Spotify search results remembered between sessions
+TRACK_CACHE_FILE = 'spotify_track_cache.json'
+TRACK_CACHE_SIZE = 2000
+TRACK_CACHE_TTL = 7 * 24 * 3600
+TRACK_CACHE_SAVE_DELAY = 5.0  # seconds; writes are batched on a timer thread
+SPOTIFY_SEARCH_CANDIDATES = 5
+# Words that don't change which track is meant
+FILLER_WORDS = {'by', 'play', 'song', 'track', 'the', 'a', 'please', 'some', 'feat', 'ft', 'featuring', 'on', 'spotify'}
+
+
+def normalize_query(text):
+    """Cache key for a song request: lowercase words without punctuation or filler, in sorted order.
+
+    Sorting makes "shape of you by ed sheeran" and "ed sheeran shape of you"
+    the same key.
+    """
+    words = re.findall(r'\w+', text.lower().replace("'", ''))
+    kept = [word for word in words if word not in FILLER_WORDS]
+    return ' '.join(sorted(kept or words))
+
+
+class TrackCache:
+    """Bounded LRU of normalized song request -> track, with a TTL, persisted to a JSON file."""
+
+    def __init__(self, path=TRACK_CACHE_FILE, max_entries=TRACK_CACHE_SIZE, ttl=TRACK_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0}
+        self._entries = OrderedDict()  # key -> {'uri', 'name', 'artist', 'stored_at'}
+        self._lock = threading.Lock()
+        self._save_timer = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable track cache {self.path}: {str(e)}")
+            return
+        now = time.time()
+        for key, entry in entries:
+            if now - entry['stored_at'] < self.ttl:
+                self._entries[key] = entry
+        logger.info(f"Loaded {len(self._entries)} cached Spotify tracks")
+
+    def get(self, query):
+        """Cached track for a song request, or None."""
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['stored_at'] >= self.ttl:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def store(self, query, tracks):
+        """Cache search results: the top track for the query, plus every candidate under its own title and artist.
+
+        Returns the entry for the top track.
+        """
+        now = time.time()
+        entries = [
+            {'uri': t['uri'], 'name': t.get('name', ''), 'artist': ', '.join(a['name'] for a in t.get('artists', [])), 'stored_at': now}
+            for t in tracks
+        ]
+        with self._lock:
+            self._put(normalize_query(query), entries[0], replace=True)
+            for entry in entries:
+                self._put(normalize_query(f"{entry['name']} {entry['artist']}"), entry, replace=True)
+                # A bare title could mean another artist's song, so never overwrite one
+                self._put(normalize_query(entry['name']), entry, replace=False)
+        self._save_soon()
+        return entries[0]
+
+    def _put(self, key, entry, replace):
+        if not key or (not replace and key in self._entries):
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _save_soon(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(TRACK_CACHE_SAVE_DELAY, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self):
+        with self._lock:
+            self._save_timer = None
+            data = json.dumps(list(self._entries.items()))
+        try:
+            write_file_atomic(self.path, data)
+        except OSError as e:
+            logger.error(f"Failed to save track cache: {str(e)}")
+
+
+_track_cache = None
+_track_cache_lock = threading.Lock()
+
+
+def get_track_cache():
+    """Process-wide TrackCache, loaded from TRACK_CACHE_FILE on first use."""
+    global _track_cache
+    with _track_cache_lock:
+        if _track_cache is None:
+            _track_cache = TrackCache(os.getenv('SPOTIFY_TRACK_CACHE_FILE', TRACK_CACHE_FILE))
+        return _track_cache
@@ -0,0 +1,331 @@
+import getpass
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Deleted folders are renamed into a staging area, then reclaimed in the background
+TRASH_DIR_NAME = '.jarvis-trash'
+TRASH_DIR = os.path.join('~', TRASH_DIR_NAME)
+# Staging directories used outside TRASH_DIR, one per line, so a restart finds their leftovers too
+TRASH_DIRS_FILE = '.staging-dirs'
+TRASH_GRACE_SECONDS = 30  # how long a staged item can still be restored
+TRASH_WORKERS = 4
+UNLINK_BATCH_SIZE = 256
+TRASH_HISTORY = 50  # finished items kept for status reports
+
+
+def format_bytes(size):
+    for unit in ('bytes', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class TrashItem:
+    """One staged deletion and its reclamation progress."""
+
+    def __init__(self, item_id, original_path, staged_path):
+        self.item_id = item_id
+        self.original_path = original_path
+        self.staged_path = staged_path
+        self.staged_at = time.time()
+        self.state = 'staged'  # staged -> deleting -> deleted | failed, or staged -> restored
+        self.held = False  # not reclaimed until released
+        self.files_found = 0
+        self.files_deleted = 0
+        self.bytes_reclaimed = 0
+        self.error = None
+
+    def describe(self):
+        name = self.original_path or os.path.basename(self.staged_path)
+        if self.state == 'staged':
+            return f"{name}: waiting to be cleaned up, can still be restored"
+        if self.state == 'deleting':
+            return (f"{name}: cleaning up, {self.files_deleted} of {self.files_found} files found so far removed, "
+                    f"{format_bytes(self.bytes_reclaimed)} reclaimed")
+        if self.state == 'deleted':
+            return f"{name}: removed {self.files_deleted} files, {format_bytes(self.bytes_reclaimed)} reclaimed"
+        if self.state == 'failed':
+            return f"{name}: cleanup failed after reclaiming {format_bytes(self.bytes_reclaimed)}: {self.error}"
+        return f"{name}: restored"
+
+
+class Trash:
+    """Instant deletes by rename into a same-filesystem staging area, reclaimed by a background pool.
+
+    stage() renames the path away and returns at once. After grace_seconds a
+    coordinator thread walks the staged tree with os.scandir and hands batches
+    of files to a worker pool to unlink in parallel, then removes the emptied
+    directories. Until reclamation starts an item can be restored.
+    """
+
+    def __init__(self, staging_root=TRASH_DIR, grace_seconds=TRASH_GRACE_SECONDS, workers=TRASH_WORKERS):
+        self.staging_root = os.path.abspath(os.path.expanduser(staging_root))
+        self.grace_seconds = grace_seconds
+        self.stats = {'staged': 0, 'restored': 0, 'deleted': 0, 'failed': 0, 'bytes_reclaimed': 0}
+        self._items = {}
+        self._due = []  # heap of (monotonic due time, sequence, item_id)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='trash')
+        self._thread = None
+        self._stopped = False
+
+    def _staging_candidates(self, path):
+        yield self.staging_root
+        mount = os.path.dirname(path)
+        while not os.path.ismount(mount) and os.path.dirname(mount) != mount:
+            mount = os.path.dirname(mount)
+        yield os.path.join(mount, f'{TRASH_DIR_NAME}-{getpass.getuser()}')
+        yield os.path.join(os.path.dirname(path), TRASH_DIR_NAME)
+
+    def _staging_dir(self, path):
+        """First staging directory on the same filesystem as path (so the move is a rename) and outside it."""
+        device = os.stat(os.path.dirname(path)).st_dev
+        for candidate in self._staging_candidates(path):
+            try:
+                if os.path.commonpath([candidate, path]) == path:
+                    continue
+            except ValueError:  # different drives on Windows
+                pass
+            try:
+                os.makedirs(candidate, mode=0o700, exist_ok=True)
+                if os.stat(candidate).st_dev == device:
+                    if candidate != self.staging_root:
+                        self._record_staging_dir(candidate)
+                    return candidate
+            except OSError:
+                continue
+        raise OSError(f"No writable trash staging directory on the same filesystem as {path}")
+
+    def _recorded_staging_dirs(self):
+        try:
+            with open(os.path.join(self.staging_root, TRASH_DIRS_FILE)) as f:
+                return [line.strip() for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def _record_staging_dir(self, directory):
+        with self._cond:
+            if directory in self._recorded_staging_dirs():
+                return
+            try:
+                os.makedirs(self.staging_root, mode=0o700, exist_ok=True)
+                with open(os.path.join(self.staging_root, TRASH_DIRS_FILE), 'a') as f:
+                    f.write(directory + '\n')
+            except OSError as e:
+                logger.warning(f"Could not record trash staging directory {directory}: {str(e)}")
+
+    def stage(self, path, hold=False):
+        """Atomically move path into the staging area and schedule its reclamation.
+
+        A held item stays restorable until release() is called for it, after
+        which the usual grace period applies.
+        """
+        path = os.path.abspath(path)
+        staging_dir = self._staging_dir(path)
+        item_id = uuid.uuid4().hex[:8]
+        staged_path = os.path.join(staging_dir, f'{item_id}-{os.path.basename(path)}')
+        item = TrashItem(item_id, path, staged_path)
+        item.held = hold
+        with self._cond:
+            os.rename(path, staged_path)
+            self._items[item_id] = item
+            if not hold:
+                heapq.heappush(self._due, (time.monotonic() + self.grace_seconds, next(self._sequence), item_id))
+            self.stats['staged'] += 1
+            self._cond.notify()
+        self.start()
+        logger.info(f"Staged {path} for deletion as {staged_path}")
+        return item
+
+    def release(self, item_id):
+        """Start the grace period of a held item; a restored or unknown item is left alone."""
+        with self._cond:
+            item = self._items.get(item_id)
+            if item is None or not item.held:
+                return
+            item.held = False
+            if item.state == 'staged':
+                heapq.heappush(self._due, (time.monotonic() + self.grace_seconds, next(self._sequence), item_id))
+                self._cond.notify()
+
+    def find(self, original_path=None):
+        """Most recent item still restorable, optionally the one staged from original_path."""
+        wanted = os.path.abspath(os.path.expanduser(original_path)) if original_path else None
+        with self._cond:
+            for item in reversed(list(self._items.values())):
+                if item.state == 'staged' and item.original_path and wanted in (None, item.original_path):
+                    return item
+        return None
+
+    def restore(self, item_id):
+        """Move a staged item back to its original path; returns that path."""
+        with self._cond:
+            item = self._items.get(item_id)
+            if item is None:
+                raise KeyError(f"Unknown trash item {item_id}")
+            if item.state != 'staged' or not item.original_path:
+                raise ValueError(f"{item.original_path or item.staged_path} can no longer be restored ({item.state})")
+            if os.path.lexists(item.original_path):
+                raise FileExistsError(f"{item.original_path} already exists")
+            os.makedirs(os.path.dirname(item.original_path), exist_ok=True)
+            os.rename(item.staged_path, item.original_path)
+            item.state = 'restored'
+            self.stats['restored'] += 1
+        logger.info(f"Restored {item.original_path} from trash")
+        return item.original_path
+
+    def items(self):
+        with self._cond:
+            return list(self._items.values())
+
+    def pending(self):
+        with self._cond:
+            return sum(1 for item in self._items.values() if item.state in ('staged', 'deleting'))
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='trash-reclaim', daemon=True)
+            self._thread.start()
+        self._queue_leftovers()
+
+    def _queue_leftovers(self):
+        """Reclaim anything a previous process staged but never finished deleting, in every staging directory."""
+        with self._cond:
+            known = {item.staged_path for item in self._items.values()}
+            for directory in [self.staging_root] + self._recorded_staging_dirs():
+                try:
+                    names = os.listdir(directory)
+                except OSError:
+                    continue
+                for name in names:
+                    staged_path = os.path.join(directory, name)
+                    if staged_path in known or (directory == self.staging_root and name == TRASH_DIRS_FILE):
+                        continue
+                    known.add(staged_path)
+                    item = TrashItem(uuid.uuid4().hex[:8], None, staged_path)
+                    self._items[item.item_id] = item
+                    heapq.heappush(self._due, (time.monotonic(), next(self._sequence), item.item_id))
+            self._cond.notify()
+
+    def _next_due(self):
+        with self._cond:
+            while not self._stopped:
+                if not self._due:
+                    self._cond.wait()
+                    continue
+                due, _, item_id = self._due[0]
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                heapq.heappop(self._due)
+                item = self._items.get(item_id)
+                if item is not None and item.state == 'staged':
+                    item.state = 'deleting'
+                    return item
+        return None
+
+    def _run(self):
+        while True:
+            item = self._next_due()
+            if item is None:
+                return
+            self._reclaim(item)
+            self._prune_history()
+
+    def _unlink_batch(self, item, batch):
+        deleted = reclaimed = 0
+        for path, size in batch:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            deleted += 1
+            reclaimed += size
+        with self._cond:
+            item.files_deleted += deleted
+            item.bytes_reclaimed += reclaimed
+            self.stats['bytes_reclaimed'] += reclaimed
+
+    def _reclaim(self, item):
+        started = time.perf_counter()
+        futures = []
+        directories = []
+        batch = []
+        try:
+            if os.path.isdir(item.staged_path) and not os.path.islink(item.staged_path):
+                stack = [item.staged_path]
+            else:
+                stack = []
+                batch.append((item.staged_path, os.lstat(item.staged_path).st_size))
+                item.files_found += 1
+            while stack:
+                directory = stack.pop()
+                directories.append(directory)
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        batch.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+                        item.files_found += 1
+                        if len(batch) >= UNLINK_BATCH_SIZE:
+                            futures.append(self._pool.submit(self._unlink_batch, item, batch))
+                            batch = []
+            if batch:
+                futures.append(self._pool.submit(self._unlink_batch, item, batch))
+            for future in futures:
+                future.result()
+            # Parents are listed before their children, so reverse order empties bottom-up
+            for directory in reversed(directories):
+                os.rmdir(directory)
+        except OSError as e:
+            for future in futures:
+                future.cancel()
+            with self._cond:
+                item.state = 'failed'
+                item.error = str(e)
+                self.stats['failed'] += 1
+            logger.error(f"Failed to reclaim {item.staged_path}: {str(e)}")
+            return
+        with self._cond:
+            item.state = 'deleted'
+            self.stats['deleted'] += 1
+        logger.info(f"Reclaimed {format_bytes(item.bytes_reclaimed)} from {item.files_deleted} files in "
+                    f"{item.original_path or item.staged_path} in {time.perf_counter() - started:.2f}s")
+
+    def _prune_history(self):
+        with self._cond:
+            finished = [i for i, item in self._items.items() if item.state in ('deleted', 'restored', 'failed')]
+            for item_id in finished[:-TRASH_HISTORY]:
+                del self._items[item_id]
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._pool.shutdown(wait=False)
+
+
+_trash = None
+_trash_lock = threading.Lock()
+
+
+def get_trash():
+    """Process-wide Trash; its reclamation thread starts with the first staged item."""
+    global _trash
+    with _trash_lock:
+        if _trash is None:
+            _trash = Trash()
+        return _trash